@@ -1,5 +1,4 @@
 #!/bin/bash
 
 source .venv/bin/activate
-python3 src/main.py
-cd public && python3 -m http.server 8888
\ No newline at end of file
+python3 src/main.py serve "$@"
@@ -0,0 +1,217 @@
+import argparse
+import json
+import os
+import platform
+import re
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from block_type import BlockType
+from copy_contents import copy_contents
+from corpus import generate_corpus
+from file_utils import make_directories, remove_tree
+from generate_pages_recursive import find_pages
+from html_node import HTMLNode, LeafNode, ParentNode
+from instrumentation import count_nodes
+from template import Template
+from utils import block_to_block_type, markdown_to_blocks, markdown_to_html_node, text_to_textnodes
+
+TEMPLATE = "<!doctype html><html><head><title>{{ Title }}</title></head><body><article>{{ Content }}</article></body></html>"
+
+
+def inline_texts(block_type: BlockType, block: str) -> list[str]:
+    match block_type:
+        case BlockType.HEADING:
+            return [block.lstrip("#")[1:]]
+        case BlockType.CODE:
+            return []
+        case BlockType.QUOTE:
+            return [" ".join(line.lstrip(">").strip() for line in block.splitlines())]
+        case BlockType.UNORDERED_LIST:
+            return [line[2:] for line in block.splitlines()]
+        case BlockType.ORDERED_LIST:
+            return [re.sub(r"^\d+\. ", "", line) for line in block.splitlines()]
+        case _:
+            return [block.replace("\n", " ")]
+
+
+def timed(function: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def run_benchmark(pages: int, seed: int, repeat: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_corpus(os.path.join(tmp, "content"), pages, seed)
+        sources = []
+        for path in paths:
+            with open(path) as file:
+                sources.append(file.read())
+
+        blocks = [block for source in sources for block in markdown_to_blocks(source)]
+        texts = [text for block in blocks for text in inline_texts(block_to_block_type(block), block)]
+        trees = [markdown_to_html_node(source) for source in sources]
+        contents = [tree.to_html() for tree in trees]
+        template = Template(TEMPLATE)
+        documents = [template.render(Title="Title", Content=content) for content in contents]
+        out_dir = os.path.join(tmp, "public")
+        os.makedirs(out_dir)
+
+        def write_documents():
+            for i, document in enumerate(documents):
+                with open(os.path.join(out_dir, f"{i}.html"), "w") as file:
+                    file.write(document)
+
+        stages = {
+            "markdown_to_blocks": lambda: [markdown_to_blocks(source) for source in sources],
+            "block_to_block_type": lambda: [block_to_block_type(block) for block in blocks],
+            "text_to_textnodes": lambda: [text_to_textnodes(text) for text in texts],
+            "markdown_to_html_node": lambda: [markdown_to_html_node(source) for source in sources],
+            "to_html": lambda: [tree.to_html() for tree in trees],
+            "template_fill": lambda: [template.render(Title="Title", Content=content) for content in contents],
+            "write": write_documents,
+        }
+        timings = {name: timed(stage, repeat) for name, stage in stages.items()}
+
+    return {
+        "meta": {
+            "pages": pages,
+            "seed": seed,
+            "repeat": repeat,
+            "blocks": len(blocks),
+            "bytes": sum(map(len, sources)),
+            "python": platform.python_version(),
+        },
+        "stages": timings,
+    }
+
+
+def recursive_html(node: HTMLNode) -> str:
+    # rendering with one call per tree level, the baseline the explicit stack is measured against
+    if not node.children:
+        return node.childless_html()
+    children = "".join(recursive_html(child) for child in node.children)
+    return f"<{node.tag}{node.props_to_html()}>{children}</{node.tag}>"
+
+
+def wide_tree(nodes: int) -> HTMLNode:
+    paragraphs = max(nodes // 1000, 1)
+    leaves = max(nodes // paragraphs - 1, 1)
+    return ParentNode("div", [
+        ParentNode("p", [LeafNode("b" if i % 2 else None, f"word {i} ") for i in range(leaves)])
+        for _ in range(paragraphs)
+    ])
+
+
+def deep_tree(depth: int) -> HTMLNode:
+    node = LeafNode("p", "innermost")
+    for _ in range(depth):
+        node = ParentNode("blockquote", [node])
+    return node
+
+
+def deep_content(dir_path: str, depth: int) -> None:
+    for _ in range(depth):
+        make_directories(dir_path)
+        with open(os.path.join(dir_path, "index.md"), "w") as file:
+            file.write("# Level\n\nText\n")
+        dir_path = os.path.join(dir_path, "d")
+
+
+def run_stress(nodes: int, tree_depth: int, dir_depth: int, repeat: int) -> dict:
+    wide = wide_tree(nodes)
+    deep = deep_tree(tree_depth)
+    try:
+        recursive_html(deep)
+        recursive_deep = "ok"
+    except RecursionError:
+        recursive_deep = "RecursionError"
+    with tempfile.TemporaryDirectory() as tmp:
+        content = os.path.join(tmp, "content")
+        deep_content(content, dir_depth)
+        stages = {
+            "to_html_wide": wide.to_html,
+            "recursive_to_html_wide": lambda: recursive_html(wide),
+            "to_html_deep": deep.to_html,
+            "find_pages_deep": lambda: find_pages(content, os.path.join(tmp, "public")),
+            "copy_contents_deep": lambda: copy_contents(content, os.path.join(tmp, "copy")),
+        }
+        timings = {name: timed(stage, repeat) for name, stage in stages.items()}
+        pages = len(find_pages(content, os.path.join(tmp, "public")))
+        # the temporary directory's own cleanup recurses once per directory level
+        remove_tree(content)
+        remove_tree(os.path.join(tmp, "copy"))
+    return {
+        "meta": {
+            "stress": True,
+            "nodes": count_nodes(wide),
+            "tree_depth": tree_depth,
+            "dir_depth": dir_depth,
+            "pages": pages,
+            "recursive_to_html_deep": recursive_deep,
+            "recursion_limit": sys.getrecursionlimit(),
+            "repeat": repeat,
+            "python": platform.python_version(),
+        },
+        "stages": timings,
+    }
+
+
+def compare(result: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for name, seconds in result["stages"].items():
+        before = baseline["stages"].get(name)
+        if before is None:
+            continue
+        change = seconds / before - 1
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{name:24} {before * 1000:10.2f} ms -> {seconds * 1000:10.2f} ms {change:+8.1%} {marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the build stages on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage, the fastest is reported")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative slowdown flagged as a regression")
+    parser.add_argument("--stress", action="store_true", help="render huge and deep trees and scan a deep content tree")
+    parser.add_argument("--nodes", type=int, default=1_000_000, help="nodes in the wide stress tree")
+    parser.add_argument("--tree-depth", type=int, default=100_000, help="nesting depth of the deep stress tree")
+    parser.add_argument("--dir-depth", type=int, default=1200, help="directory depth of the stress content tree")
+    args = parser.parse_args()
+
+    if args.stress:
+        result = run_stress(args.nodes, args.tree_depth, args.dir_depth, args.repeat)
+        print(", ".join(f"{name} {value}" for name, value in result["meta"].items()))
+    else:
+        result = run_benchmark(args.pages, args.seed, args.repeat)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline["meta"] != result["meta"] if args.stress else (
+            baseline["meta"]["pages"] != args.pages or baseline["meta"]["seed"] != args.seed
+        ):
+            print("warning: baseline was recorded with a different corpus")
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+    else:
+        for name, seconds in result["stages"].items():
+            print(f"{name:24} {seconds * 1000:10.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+CACHE_FORMAT = 3
+
+
+class BlockCache:
+    def __init__(self, max_size: int = 4096, path: str = None, salt: str = ""):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.path = path
+        self.salt = salt
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # keys put since the last take_new_entries(), tracked only in worker processes that hand them to the parent
+        self.new_keys = None
+
+    @classmethod
+    def load(cls, path: str, max_size: int = 4096, salt: str = "") -> 'BlockCache':
+        cache = cls(max_size, path, salt)
+        if not os.path.isfile(path):
+            return cache
+        with open(path) as file:
+            data = json.load(file)
+        if data.get("format") == CACHE_FORMAT and data.get("salt") == salt:
+            for key, entry in data["entries"][-max_size:]:
+                cache.entries[key] = tuple(entry)
+        return cache
+
+    def save(self) -> None:
+        if self.path is None:
+            raise ValueError("BlockCache has no path to save to")
+        dirpath = os.path.dirname(self.path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"format": CACHE_FORMAT, "salt": self.salt, "entries": list(self.entries.items())}, file)
+        os.replace(tmp_path, self.path)
+
+    def key(self, block: str, salt: str = "") -> str:
+        return hashlib.blake2b(f"{self.salt}\0{salt}\0{block}".encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> None | tuple[str, int, int]:
+        # the HTML of the block, the number of nodes it was rendered from and the bytes minifying saved
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, html: str, nodes: int = 1, saved: int = 0) -> None:
+        if self.new_keys is not None:
+            self.new_keys.append(key)
+        self.entries[key] = (html, nodes, saved)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def take_new_entries(self) -> list[tuple[str, tuple[str, int, int]]]:
+        entries = [(key, self.entries[key]) for key in dict.fromkeys(self.new_keys) if key in self.entries]
+        self.new_keys = []
+        return entries
+
+    def merge(self, hits: int, misses: int, entries: list[tuple[str, tuple[str, int, int]]]) -> None:
+        self.hits += hits
+        self.misses += misses
+        for key, entry in entries:
+            self.put(key, *entry)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __repr__(self):
+        return f"BlockCache({len(self.entries)}/{self.max_size}, hits={self.hits}, misses={self.misses})"
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from render_context import RenderContext
+from utils import markdown_to_html_node
+
+
+class BlockCacheTest(unittest.TestCase):
+    def test_it_counts_hits_and_misses(self):
+        cache = BlockCache(max_size=2)
+
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", "<p>a</p>", 2)
+
+        self.assertEqual(("<p>a</p>", 2, 0), cache.get("a"))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+
+    def test_it_evicts_the_least_recently_used_entry(self):
+        cache = BlockCache(max_size=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+
+        cache.put("c", "3")
+
+        self.assertEqual(["a", "c"], list(cache.entries))
+
+    def test_it_persists_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "blocks.json")
+            cache = BlockCache(path=path)
+            cache.put(cache.key("block"), "<p>block</p>")
+            cache.save()
+
+            loaded = BlockCache.load(path)
+            other_salt = BlockCache.load(path, salt="minified")
+
+        self.assertEqual(("<p>block</p>", 1, 0), loaded.get(loaded.key("block")))
+        self.assertEqual(0, len(other_salt))
+
+    def test_markdown_to_html_node_renders_the_same_with_a_cache(self):
+        md = "# Title\n\nSame **block**\n\n- a\n- b\n\nSame **block**"
+        cache = BlockCache()
+
+        first = markdown_to_html_node(md, cache).to_html()
+        second = markdown_to_html_node(md, cache).to_html()
+
+        self.assertEqual(markdown_to_html_node(md).to_html(), first)
+        self.assertEqual(first, second)
+        self.assertEqual((5, 3), (cache.hits, cache.misses))
+
+    def test_image_less_blocks_use_the_cache_with_a_render_context(self):
+        cache = BlockCache()
+
+        markdown_to_html_node("Same\n\nSame\n\nSame", cache, RenderContext())
+
+        self.assertEqual((2, 1), (cache.hits, cache.misses))
+
+    def test_blocks_with_eager_images_skip_the_cache(self):
+        md = "![a](/a.png)\n\n![a](/a.png)\n\n![a](/a.png)"
+        cache = BlockCache()
+
+        html = markdown_to_html_node(md, cache, RenderContext()).to_html()
+
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        self.assertEqual(2, html.count('loading="lazy"'))
+
+
+if __name__ == '__main__':
+    unittest.main()
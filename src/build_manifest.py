@@ -0,0 +1,62 @@
+import hashlib
+import json
+import os
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BuildManifest:
+    def __init__(self, path: str, entries: dict[str, dict] = None):
+        self.path = path
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def load(cls, path: str) -> 'BuildManifest':
+        if not os.path.isfile(path):
+            return cls(path)
+        with open(path) as file:
+            data = json.load(file)
+        return cls(path, data.get("entries", {}))
+
+    def save(self) -> None:
+        dirpath = os.path.dirname(self.path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"entries": self.entries}, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def source_hash(self, key: str, path: str) -> str:
+        stat = os.stat(path)
+        entry = self.entries.get(key)
+        if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            return entry["hash"]
+        return hash_file(path)
+
+    def is_stale(self, key: str, source_hash: str, inputs: dict[str, str], output_path: str) -> bool:
+        entry = self.entries.get(key)
+        if entry is None:
+            return True
+        if entry["hash"] != source_hash or entry["inputs"] != inputs:
+            return True
+        return not os.path.isfile(output_path)
+
+    def record(self, key: str, path: str, source_hash: str, inputs: dict[str, str], output: str) -> None:
+        stat = os.stat(path)
+        self.entries[key] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": source_hash,
+            "inputs": inputs,
+            "output": output,
+        }
+
+    def forget(self, key: str) -> None:
+        del self.entries[key]
@@ -1,31 +1,154 @@
 import os.path
 import shutil
+import stat
 
+from build_manifest import BuildManifest, hash_file
+from file_utils import remove_empty_parents, remove_tree, temporary_path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+FICLONE = 0x40049409
+LINK_MODES = ("hardlink", "reflink")
+
+
+def copy_contents(
+    source,
+    destination,
+    sync: bool = False,
+    checksum: bool = False,
+    link: str = None,
+    manifest_path: str = None,
+):
+    if sync:
+        return sync_contents(source, destination, checksum=checksum, link=link, manifest_path=manifest_path)
 
-def copy_contents(source, destination):
     if os.path.isdir(destination):
-        shutil.rmtree(destination)
+        remove_tree(destination)
 
     os.mkdir(destination)
 
-    def recurse(src, next_dst):
-        for dir_entry in os.listdir(src):
-            next_src = os.path.join(src, dir_entry)
-            copy(next_src, next_dst)
-
-    def copy(src, dst):
-        if not os.path.isdir(dst):
-            raise ValueError("destination must be a directory")
-        if os.path.islink(src):
-            return  # intentionally skip links
-        if os.path.isfile(src):
-            file_name = os.path.basename(src)
-            shutil.copyfile(src, os.path.join(dst, file_name))
-            return
-        if os.path.isdir(src):
-            dir_name = os.path.basename(src)
-            next_dst = os.path.join(dst, dir_name)
-            os.mkdir(next_dst)
-            recurse(src, next_dst)
-
-    recurse(source, destination)
+    directories = [(source, destination)]
+    while directories:
+        src_dir, dst_dir = directories.pop()
+        for dir_entry in os.listdir(src_dir):
+            src = os.path.join(src_dir, dir_entry)
+            if os.path.islink(src):
+                continue  # intentionally skip links
+            if os.path.isfile(src):
+                shutil.copyfile(src, os.path.join(dst_dir, dir_entry))
+            elif os.path.isdir(src):
+                dst = os.path.join(dst_dir, dir_entry)
+                os.mkdir(dst)
+                directories.append((src, dst))
+
+
+def sync_contents(
+    source: str,
+    destination: str,
+    checksum: bool = False,
+    link: str = None,
+    manifest_path: str = None,
+) -> dict[str, int]:
+    if link is not None and link not in LINK_MODES:
+        raise ValueError(f"Invalid link mode: {link}")
+    if not os.path.isdir(source):
+        raise ValueError(f"Source directory {source} does not exist")
+    stats = {"copied": 0, "linked": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+    synced = set()
+
+    directories = [(source, destination)]
+    while directories:
+        src_dir, dst_dir = directories.pop()
+        ensure_directory(dst_dir)
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                if entry.is_symlink():
+                    continue  # intentionally skip links
+                dst = os.path.join(dst_dir, entry.name)
+                if entry.is_dir():
+                    directories.append((entry.path, dst))
+                elif entry.is_file():
+                    synced.add(os.path.relpath(entry.path, source))
+                    sync_file(entry.path, entry.stat(), dst, checksum, link, stats)
+
+    if manifest_path is not None:
+        manifest = BuildManifest.load(manifest_path)
+        for key in manifest.entries.keys() - synced:
+            stale_path = os.path.join(destination, key)
+            if os.path.isfile(stale_path):
+                os.remove(stale_path)
+                stats["removed"] += 1
+                remove_empty_parents(os.path.dirname(stale_path), destination)
+        manifest.entries = {key: {} for key in sorted(synced)}
+        manifest.save()
+
+    print(
+        f"Synced {len(synced)} static files: {stats['copied']} copied, {stats['linked']} linked, "
+        f"{stats['unchanged']} unchanged, {stats['removed']} removed"
+    )
+    return stats
+
+
+def ensure_directory(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        return
+    if os.path.lexists(path):
+        os.remove(path)
+    os.makedirs(path)
+
+
+def sync_file(src: str, src_stat: os.stat_result, dst: str, checksum: bool, link: str, stats: dict[str, int]) -> None:
+    try:
+        dst_stat = os.lstat(dst)
+    except FileNotFoundError:
+        dst_stat = None
+    if dst_stat is not None and is_up_to_date(src, src_stat, dst, dst_stat, checksum):
+        stats["unchanged"] += 1
+        return
+    if dst_stat is not None and stat.S_ISDIR(dst_stat.st_mode):
+        remove_tree(dst)
+    tmp_path = temporary_path(dst)
+    if link is not None and place_link(src, tmp_path, link):
+        stats["linked"] += 1
+    else:
+        shutil.copyfile(src, tmp_path)
+        stats["copied"] += 1
+        stats["bytes"] += src_stat.st_size
+    os.utime(tmp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    # replacing instead of writing in place keeps hardlinked copies of the old file intact
+    os.replace(tmp_path, dst)
+
+
+def is_up_to_date(src: str, src_stat: os.stat_result, dst: str, dst_stat: os.stat_result, checksum: bool) -> bool:
+    if not stat.S_ISREG(dst_stat.st_mode):
+        return False
+    if (src_stat.st_dev, src_stat.st_ino) == (dst_stat.st_dev, dst_stat.st_ino):
+        return True
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if not checksum:
+        return src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+    if hash_file(src) != hash_file(dst):
+        return False
+    if src_stat.st_mtime_ns != dst_stat.st_mtime_ns:
+        os.utime(dst, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+
+def place_link(src: str, dst: str, link: str) -> bool:
+    try:
+        if link == "hardlink":
+            os.link(src, dst)
+            return True
+        if fcntl is None:
+            return False
+        with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        return True
+    except OSError:
+        if os.path.lexists(dst):
+            os.remove(dst)
+        return False
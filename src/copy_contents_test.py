@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import unittest
+
+from copy_contents import copy_contents
+from test_helpers import TempDirTestCase, read_file, write_file
+
+
+class CopyContentsTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, ".build", "static.json")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "tom.png"), "png")
+
+    def sync(self, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return copy_contents(self.static, self.public, sync=True, manifest_path=self.manifest, **kwargs)
+
+    def test_it_replaces_the_destination(self):
+        write_file(os.path.join(self.public, "index.html"), "page")
+
+        copy_contents(self.static, self.public)
+
+        self.assertEqual(["images", "index.css"], sorted(os.listdir(self.public)))
+
+    def test_sync_copies_new_files(self):
+        stats = self.sync()
+
+        self.assertEqual(2, stats["copied"])
+        self.assertEqual("png", read_file(os.path.join(self.public, "images", "tom.png")))
+
+    def test_sync_skips_unchanged_files(self):
+        self.sync()
+
+        stats = self.sync()
+
+        self.assertEqual(0, stats["copied"])
+        self.assertEqual(2, stats["unchanged"])
+
+    def test_sync_copies_changed_files(self):
+        self.sync()
+        write_file(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+
+        stats = self.sync()
+
+        self.assertEqual(1, stats["copied"])
+        self.assertEqual("body { margin: 0 }", read_file(os.path.join(self.public, "index.css")))
+
+    def test_sync_with_checksum_ignores_touched_files(self):
+        self.sync()
+        os.utime(os.path.join(self.static, "index.css"), ns=(0, 0))
+
+        stats = self.sync(checksum=True)
+
+        self.assertEqual(0, stats["copied"])
+
+    def test_sync_removes_stale_files_only(self):
+        self.sync()
+        write_file(os.path.join(self.public, "index.html"), "page")
+        os.remove(os.path.join(self.static, "images", "tom.png"))
+
+        stats = self.sync()
+
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "index.html")))
+
+    def test_sync_hardlinks_files(self):
+        self.sync(link="hardlink")
+
+        source_stat = os.stat(os.path.join(self.static, "index.css"))
+        destination_stat = os.stat(os.path.join(self.public, "index.css"))
+        self.assertEqual(source_stat.st_ino, destination_stat.st_ino)
+
+    def test_sync_does_not_write_through_hardlinks(self):
+        self.sync(link="hardlink")
+        os.remove(os.path.join(self.static, "index.css"))
+        write_file(os.path.join(self.static, "index.css"), "new")
+        old_link = os.path.join(self.tmp.name, "old.css")
+        os.link(os.path.join(self.public, "index.css"), old_link)
+
+        self.sync()
+
+        self.assertEqual("body {}", read_file(old_link))
+        self.assertEqual("new", read_file(os.path.join(self.public, "index.css")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import argparse
+import os
+import random
+
+WORDS = (
+    "elf hobbit ring shire mordor wizard river mountain forest road king steward tower song "
+    "ancient shadow light journey fellowship council sword riddle dragon mithril lore map "
+    "the a of and to in is was that with for as on by from at which but not they their"
+).split()
+
+
+def words(rng: random.Random, low: int, high: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def inline_text(rng: random.Random, low: int = 8, high: int = 40) -> str:
+    parts = []
+    for _ in range(rng.randint(1, 4)):
+        parts.append(words(rng, low // 4 + 1, high // 4 + 1))
+        kind = rng.random()
+        if kind < 0.2:
+            parts.append(f"**{words(rng, 1, 3)}**")
+        elif kind < 0.4:
+            parts.append(f"_{words(rng, 1, 3)}_")
+        elif kind < 0.55:
+            parts.append(f"`{rng.choice(WORDS)}()`")
+        elif kind < 0.7:
+            parts.append(f"[{words(rng, 1, 3)}](/{rng.choice(WORDS)}/{rng.choice(WORDS)})")
+        elif kind < 0.75:
+            parts.append(f"![{words(rng, 2, 4)}](/images/{rng.choice(WORDS)}.png)")
+    return " ".join(parts)
+
+
+def block(rng: random.Random) -> str:
+    kind = rng.random()
+    if kind < 0.45:
+        return "\n".join(inline_text(rng) for _ in range(rng.randint(1, 4)))
+    if kind < 0.55:
+        return f"{'#' * rng.randint(2, 4)} {words(rng, 2, 6)}"
+    if kind < 0.65:
+        lines = [f"{rng.choice(WORDS)} = {rng.randint(0, 999)}" for _ in range(rng.randint(1, 12))]
+        return "```\n" + "\n".join(lines) + "\n```"
+    if kind < 0.75:
+        return "\n".join(f"> {inline_text(rng, 4, 16)}" for _ in range(rng.randint(1, 4)))
+    if kind < 0.88:
+        return "\n".join(f"- {inline_text(rng, 2, 12)}" for _ in range(rng.randint(2, 12)))
+    return "\n".join(f"{i}. {inline_text(rng, 2, 12)}" for i in range(1, rng.randint(3, 12)))
+
+
+def generate_page_markdown(rng: random.Random) -> str:
+    n_blocks = min(int(rng.lognormvariate(3, 0.8)) + 1, 2000)
+    blocks = [f"# {words(rng, 2, 6).title()}"]
+    blocks.extend(block(rng) for _ in range(n_blocks))
+    return "\n\n".join(blocks) + "\n"
+
+
+def generate_corpus(dest_dir: str, pages: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(pages):
+        section = f"section-{i % 20:02d}"
+        path = os.path.join(dest_dir, section, f"page-{i:05d}", "index.md")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(generate_page_markdown(rng))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic markdown corpus")
+    parser.add_argument("dest", help="directory to write the corpus to")
+    parser.add_argument("--pages", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.dest, args.pages, args.seed)
+    print(f"Generated {len(paths)} pages in {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+import os
+import tempfile
+import unittest
+
+from corpus import generate_corpus
+from extract_title import extract_title
+from test_helpers import read_file
+from utils import markdown_to_html_node
+
+
+class CorpusTest(unittest.TestCase):
+    def test_it_is_deterministic_for_a_seed(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+            first_pages = [read_file(path) for path in generate_corpus(first, 5, seed=7)]
+            second_pages = [read_file(path) for path in generate_corpus(second, 5, seed=7)]
+
+        self.assertEqual(first_pages, second_pages)
+
+    def test_it_generates_valid_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = generate_corpus(tmp, 20, seed=1)
+
+            for path in paths:
+                markdown = read_file(path)
+                self.assertTrue(extract_title(markdown))
+                self.assertTrue(markdown_to_html_node(markdown).to_html().startswith("<div>"))
+        self.assertEqual(20, len(set(map(os.path.dirname, paths))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+
+from file_utils import replace_if_changed, temporary_path
+
+ETAG_MANIFEST_NAME = ".etags.json"
+
+
+def file_etag(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(1 << 16):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:20]}"'
+
+
+def data_etag(data: bytes) -> str:
+    return f'"{hashlib.sha256(data).hexdigest()[:20]}"'
+
+
+def load_etags(dest_dir_path: str) -> dict[str, list]:
+    manifest_path = os.path.join(dest_dir_path, ETAG_MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        return {}
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def write_etags(dest_dir_path: str) -> dict[str, int]:
+    # entries are [size, mtime_ns, etag]; outputs that were left untouched keep their etag without being read
+    previous = load_etags(dest_dir_path)
+    entries = {}
+    stats = {"hashed": 0, "unchanged": 0}
+    directories = [dest_dir_path]
+    while directories:
+        with os.scandir(directories.pop()) as dir_entries:
+            for entry in dir_entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+                    continue
+                if entry.name.startswith(".") or not entry.is_file():
+                    continue
+                key = os.path.relpath(entry.path, dest_dir_path).replace(os.sep, "/")
+                stat = entry.stat()
+                cached = previous.get(key)
+                if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+                    entries[key] = cached
+                    stats["unchanged"] += 1
+                    continue
+                entries[key] = [stat.st_size, stat.st_mtime_ns, file_etag(entry.path)]
+                stats["hashed"] += 1
+    manifest_path = os.path.join(dest_dir_path, ETAG_MANIFEST_NAME)
+    tmp_path = temporary_path(manifest_path)
+    with open(tmp_path, "w") as file:
+        json.dump(entries, file, separators=(",", ":"), sort_keys=True)
+    replace_if_changed(tmp_path, manifest_path)
+    print(f"ETags for {len(entries)} files: {stats['hashed']} hashed, {stats['unchanged']} unchanged")
+    return stats
+
+
+def remove_etags(dest_dir_path: str) -> None:
+    manifest_path = os.path.join(dest_dir_path, ETAG_MANIFEST_NAME)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
@@ -1,9 +1,13 @@
-from re import match
+import re
+from typing import Iterable
 
+TITLE_PATTERN = re.compile(r"^#([^#].+)$")
 
-def extract_title(markdown: str) -> str:
-    for line in markdown.splitlines():
-        matches = match(r"^#([^#].+)$", line)
+
+def extract_title(markdown: str | Iterable[str]) -> str:
+    lines = markdown.splitlines() if isinstance(markdown, str) else markdown
+    for line in lines:
+        matches = TITLE_PATTERN.match(line)
         if matches:
             return matches.group(1).lstrip()
-    raise ValueError('No title found')
\ No newline at end of file
+    raise ValueError('No title found')
@@ -14,6 +14,13 @@ class MyTestCase(unittest.TestCase):
 
         self.assertEqual(expected_title, actual_title)
 
+    def test_it_reads_the_title_from_a_file(self):
+        expected_title = "Tolkien Fan Club"
+        with open(base_path("content/index.md")) as file:
+            actual_title = extract_title(file)
+
+        self.assertEqual(expected_title, actual_title)
+
     def test_it_throws_an_error_if_no_title_is_found(self):
         markdown = "## h1 is mandatory"
 
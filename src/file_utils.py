@@ -0,0 +1,66 @@
+import filecmp
+import os
+
+
+def temporary_path(path: str) -> str:
+    dirpath, name = os.path.split(path)
+    return os.path.join(dirpath, f".{name}.{os.getpid()}.tmp")
+
+
+def replace_if_changed(tmp_path: str, path: str) -> bool:
+    # an identical output keeps its inode and mtime, so rsync and uploads see nothing to transfer
+    try:
+        if os.path.getsize(tmp_path) == os.path.getsize(path) and filecmp.cmp(tmp_path, path, shallow=False):
+            os.remove(tmp_path)
+            return False
+    except FileNotFoundError:
+        pass
+    os.replace(tmp_path, path)
+    return True
+
+
+def output_identity(path: str) -> None | tuple[int, int]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def make_directories(path: str) -> None:
+    # like os.makedirs, which recurses once per missing parent directory
+    missing = []
+    while path and not os.path.isdir(path):
+        missing.append(path)
+        path = os.path.dirname(path)
+    for directory in reversed(missing):
+        try:
+            os.mkdir(directory)
+        except FileExistsError:
+            if not os.path.isdir(directory):
+                raise
+
+
+def remove_tree(path: str) -> None:
+    # like shutil.rmtree, which recurses once per directory level
+    directories = [path]
+    while directories:
+        with os.scandir(directories[-1]) as entries:
+            subdirectories = []
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.path)
+                else:
+                    os.remove(entry.path)
+        if subdirectories:
+            directories.extend(subdirectories)
+        else:
+            os.rmdir(directories.pop())
+
+
+def remove_empty_parents(dir_path: str, root: str) -> None:
+    root = os.path.abspath(root)
+    dir_path = os.path.abspath(dir_path)
+    while dir_path != root and dir_path.startswith(root) and not os.listdir(dir_path):
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+
+from build_manifest import BuildManifest
+from file_utils import remove_empty_parents, temporary_path
+
+ASSET_MANIFEST_NAME = "asset-manifest.json"
+HASH_LENGTH = 10
+
+
+def fingerprinted_path(path: str, file_hash: str) -> str:
+    dirpath, name = os.path.split(path)
+    stem, extension = os.path.splitext(name)
+    return os.path.join(dirpath, f"{stem}.{file_hash[:HASH_LENGTH]}{extension}")
+
+
+def fingerprint_assets(source: str, destination: str, manifest_path: str) -> dict[str, str]:
+    manifest = BuildManifest.load(manifest_path)
+    previous_outputs = {entry["output"] for entry in manifest.entries.values()}
+    asset_urls = {}
+    seen = set()
+    directories = [source]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir():
+                    directories.append(entry.path)
+                    continue
+                key = os.path.relpath(entry.path, source)
+                seen.add(key)
+                file_hash = manifest.source_hash(key, entry.path)
+                output = fingerprinted_path(key, file_hash)
+                output_path = os.path.join(destination, output)
+                if not os.path.isfile(output_path):
+                    place_copy(entry.path, os.path.join(destination, key), output_path)
+                manifest.record(key, entry.path, file_hash, {}, output)
+                asset_urls[to_url(key)] = to_url(output)
+
+    current_outputs = {manifest.entries[key]["output"] for key in seen}
+    for output in previous_outputs - current_outputs:
+        output_path = os.path.join(destination, output)
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+            remove_empty_parents(os.path.dirname(output_path), destination)
+    for key in manifest.entries.keys() - seen:
+        manifest.forget(key)
+    manifest.save()
+
+    asset_manifest_path = os.path.join(destination, ASSET_MANIFEST_NAME)
+    tmp_path = temporary_path(asset_manifest_path)
+    with open(tmp_path, "w") as file:
+        json.dump(asset_urls, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, asset_manifest_path)
+    print(f"Fingerprinted {len(asset_urls)} static files")
+    return asset_urls
+
+
+def load_asset_urls(destination: str) -> dict[str, str]:
+    asset_manifest_path = os.path.join(destination, ASSET_MANIFEST_NAME)
+    if not os.path.isfile(asset_manifest_path):
+        return {}
+    with open(asset_manifest_path) as file:
+        return json.load(file)
+
+
+def place_copy(src: str, synced_path: str, dst: str) -> None:
+    tmp_path = temporary_path(dst)
+    try:
+        os.link(synced_path, tmp_path)
+    except OSError:
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dst)
+
+
+def to_url(path: str) -> str:
+    return "/" + path.replace(os.sep, "/")
@@ -0,0 +1,84 @@
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from copy_contents import copy_contents
+from fingerprint import ASSET_MANIFEST_NAME, fingerprint_assets, fingerprinted_path, load_asset_urls
+from render_context import RenderContext
+from template import Template
+from test_helpers import TempDirTestCase, write_file
+from text_node import TextNode, TextType
+from utils import markdown_to_html_node, text_node_to_html_node
+
+
+class FingerprintTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, ".build", "assets.json")
+        write_file(os.path.join(self.static, "index.css"), "body {}")
+        write_file(os.path.join(self.static, "images", "tom.png"), "png")
+
+    def fingerprint(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            copy_contents(self.static, self.public, sync=True)
+            return fingerprint_assets(self.static, self.public, self.manifest)
+
+    def test_fingerprinted_path(self):
+        self.assertEqual(os.path.join("images", "tom.0123456789.png"), fingerprinted_path(os.path.join("images", "tom.png"), "0123456789abcdef"))
+        self.assertEqual("LICENSE.0123456789", fingerprinted_path("LICENSE", "0123456789abcdef"))
+
+    def test_it_writes_hashed_copies_and_an_asset_manifest(self):
+        asset_urls = self.fingerprint()
+
+        self.assertEqual({"/index.css", "/images/tom.png"}, set(asset_urls))
+        self.assertRegex(asset_urls["/index.css"], r"^/index\.[0-9a-f]{10}\.css$")
+        with open(os.path.join(self.public, asset_urls["/index.css"][1:])) as file:
+            self.assertEqual("body {}", file.read())
+        with open(os.path.join(self.public, ASSET_MANIFEST_NAME)) as file:
+            self.assertEqual(asset_urls, json.load(file))
+        self.assertEqual(asset_urls, load_asset_urls(self.public))
+
+    def test_it_replaces_outdated_hashed_copies(self):
+        old_url = self.fingerprint()["/index.css"]
+        write_file(os.path.join(self.static, "index.css"), "body { margin: 0 }")
+
+        new_url = self.fingerprint()["/index.css"]
+
+        self.assertNotEqual(old_url, new_url)
+        self.assertFalse(os.path.exists(os.path.join(self.public, old_url[1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.public, new_url[1:])))
+
+
+class RenderContextTest(unittest.TestCase):
+    def setUp(self):
+        self.context = RenderContext({"/index.css": "/index.abc.css", "/images/tom.png": "/images/tom.abc.png"})
+
+    def test_it_rewrites_template_references(self):
+        template = Template('<link href="/index.css" rel="stylesheet" /><a href="/blog">{{ Content }}</a>')
+
+        rewritten = self.context.template(template)
+
+        self.assertEqual('<link href="/index.abc.css" rel="stylesheet" /><a href="/blog">x</a>', rewritten.render(Content="x"))
+        self.assertIs(rewritten, self.context.template(template))
+
+    def test_it_rewrites_image_and_link_urls(self):
+        image = text_node_to_html_node(TextNode("Tom", TextType.IMAGE, "/images/tom.png"), self.context)
+        link = text_node_to_html_node(TextNode("Tom", TextType.LINK, "/images/tom.png"), self.context)
+        other = text_node_to_html_node(TextNode("Blog", TextType.LINK, "/blog"), self.context)
+
+        self.assertEqual('<img src="/images/tom.abc.png" alt="Tom"></img>', image.to_html())
+        self.assertEqual('<a href="/images/tom.abc.png">Tom</a>', link.to_html())
+        self.assertEqual('<a href="/blog">Blog</a>', other.to_html())
+
+    def test_markdown_to_html_node_uses_the_context(self):
+        html = markdown_to_html_node("See ![Tom](/images/tom.png) here", context=self.context).to_html()
+
+        self.assertEqual('<div><p>See <img src="/images/tom.abc.png" alt="Tom"></img> here</p></div>', html)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,20 +1,90 @@
 import os
+from typing import Iterator, TextIO
 
-from extract_title import extract_title
-from utils import markdown_to_html_node
+from block_cache import BlockCache
+from file_utils import make_directories, replace_if_changed, temporary_path
+from instrumentation import PageProfile
+from mapped_source import MappedSource
+from metadata import page_title
+from render_context import RenderContext
+from template import Template, load_template
+from utils import markdown_to_html
 
+PAGE_SLOTS = ("Title", "Content")
 
-def generate_page(from_path: str, template_path: str, dest_path: str) -> None:
+
+def generate_page(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profile: PageProfile = None,
+    block_cache: BlockCache = None,
+    context: RenderContext = None,
+) -> None | dict:
     print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    with open(from_path) as file:
-        markdown = file.read()
-    with open(template_path) as file:
-        template = file.read()
-    title = extract_title(markdown)
-    html_content = markdown_to_html_node(markdown).to_html()
-    html_document = template.replace("{{ Title }}", title).replace("{{ Content }}", html_content)
+    template = prepare_template(load_template(template_path), context, profile)
+    dest_dirpath = os.path.dirname(dest_path)
+    make_directories(dest_dirpath)
+    # blocks are rendered while the page is written, so it goes to a temporary file until it is complete
+    tmp_path = temporary_path(dest_path)
+    if profile is not None:
+        profile.enter("read")
+    try:
+        with MappedSource(from_path) as source, open(tmp_path, "w") as file:
+            title = page_title(source_lines(source, profile))
+            content = markdown_to_html(source_lines(source, profile), block_cache, context, profile)
+            if profile is None:
+                template.render_to(file, Title=title, Content=content)
+            else:
+                write_profiled(file, template.stream(Title=title, Content=content), profile)
+        replace_if_changed(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if profile is not None:
+            profile.enter(None)
+    if profile is not None:
+        profile.output_bytes = os.path.getsize(dest_path)
+    return None if context is None else context.search_entry(title)
+
+
+def render_page(
+    markdown: str,
+    template: Template,
+    block_cache: BlockCache = None,
+    context: RenderContext = None,
+    profile: PageProfile = None,
+) -> str:
+    title = page_title(markdown)
+    content = markdown_to_html(markdown, block_cache, context, profile)
+    chunks = prepare_template(template, context, profile).stream(Title=title, Content=content)
+    return "".join(chunks if profile is None else profile.timed("template", chunks))
+
+
+def prepare_template(template: Template, context: RenderContext = None, profile: PageProfile = None) -> Template:
+    if context is None:
+        return template
+    if profile is not None:
+        profile.bytes_saved += context.template_bytes_saved(template)
+    return context.template(template)
+
+
+def source_lines(source: MappedSource, profile: PageProfile = None) -> Iterator[str]:
+    return source.lines() if profile is None else profile.timed("read", source.lines())
+
+
+def write_profiled(file: TextIO, chunks: Iterator[str], profile: PageProfile) -> None:
+    # the time not spent producing the next chunk goes to writing it
+    profile.enter("write")
+    for chunk in profile.timed("template", chunks):
+        file.write(chunk)
+
+
+def write_page(dest_path: str, html_document: str) -> bool:
     dest_dirpath = os.path.dirname(dest_path)
-    if not os.path.isdir(dest_dirpath):
-        os.makedirs(dest_dirpath)
-    with open(dest_path, "w") as file:
+    make_directories(dest_dirpath)
+    # replaced rather than rewritten in place, so a hardlinked copy of the old page is left alone
+    tmp_path = temporary_path(dest_path)
+    with open(tmp_path, "w") as file:
         file.write(html_document)
+    return replace_if_changed(tmp_path, dest_path)
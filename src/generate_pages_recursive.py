@@ -1,20 +1,241 @@
+import contextlib
+import io
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator
 
-from generate_page import generate_page
+from block_cache import BlockCache
+from build_manifest import BuildManifest, hash_file
+from file_utils import make_directories, output_identity, remove_empty_parents
+from generate_page import PAGE_SLOTS, generate_page
+from instrumentation import BuildProfile, PageProfile
+from pipeline import build_pages_pipelined
+from render_context import RenderContext
+from search_index import SearchIndex, page_url
+from shard import shard_key, shard_of
+from template import load_template
 
 
-def generate_pages_recursive(dir_path_content: str, template_path: str, dest_dir_path: str):
+def generate_pages_recursive(
+    dir_path_content: str,
+    template_path: str,
+    dest_dir_path: str,
+    manifest_path: str = None,
+    jobs: int = 1,
+    only: Iterable[str] = None,
+    profile: BuildProfile = None,
+    block_cache: BlockCache = None,
+    pipeline_depth: int = 0,
+    context: RenderContext = None,
+    shard: tuple[int, int] = None,
+    search_index: SearchIndex = None,
+) -> list[tuple[str, str]]:
     if not os.path.isdir(dir_path_content):
         raise ValueError(f"Content directory {dir_path_content} does not exist")
+    if search_index is not None and (context is None or context.terms is None):
+        raise ValueError("A search index needs a RenderContext that collects terms")
     if not os.path.isfile(template_path):
         raise ValueError(f"Template {template_path} does not exist")
-    if not os.path.isdir(dest_dir_path):
-        os.makedirs(dest_dir_path)
-    for item in os.listdir(dir_path_content):
-        item_path = os.path.join(dir_path_content, item)
-        if os.path.isdir(item_path):
-            next_dest_dir_path = os.path.join(dest_dir_path, item)
-            generate_pages_recursive(item_path, template_path, next_dest_dir_path)
-        if item.endswith(".md"):
-            dest_file_path = os.path.join(dest_dir_path, item[:-2] + "html")
-            generate_page(item_path, template_path, dest_file_path)
+    make_directories(dest_dir_path)
+    load_template(template_path).check_slots(dict.fromkeys(PAGE_SLOTS))
+    if only is None:
+        pages = find_pages(dir_path_content, dest_dir_path)
+    else:
+        only = set(only)
+        pages = [
+            (path, page_dest_path(path, dir_path_content, dest_dir_path))
+            for path in sorted(only)
+            if path.endswith(".md") and os.path.isfile(path)
+        ]
+    if shard is not None:
+        index, count = shard
+        pages = [page for page in pages if shard_of(shard_key(page[0], dir_path_content), count) == index]
+    if manifest_path is None:
+        for (from_path, dest_path), search_entry in build_pages(
+            pages, template_path, jobs, profile, block_cache, pipeline_depth, context
+        ):
+            if search_index is not None:
+                update_search_index(search_index, from_path, dest_path, dir_path_content, dest_dir_path, search_entry)
+        if search_index is not None:
+            search_index.write(dest_dir_path)
+            search_index.save()
+        return pages
+    manifest = BuildManifest.load(manifest_path)
+    inputs = {"template": hash_file(template_path)}
+    if context is not None:
+        inputs["render"] = context.salt
+    generated = 0
+    changed = 0
+    try:
+        seen = set()
+        stale_pages = []
+        source_hashes = {}
+        for from_path, dest_path in pages:
+            key = os.path.relpath(from_path, dir_path_content)
+            seen.add(key)
+            source_hashes[from_path] = manifest.source_hash(key, from_path)
+            if manifest.is_stale(key, source_hashes[from_path], inputs, dest_path) or (
+                search_index is not None and key not in search_index.pages
+            ):
+                stale_pages.append((from_path, dest_path))
+        # identical outputs are left in place, so a page whose file is still the same one did not change
+        previous_outputs = {dest_path: output_identity(dest_path) for _, dest_path in stale_pages}
+        for (from_path, dest_path), search_entry in build_pages(
+            stale_pages, template_path, jobs, profile, block_cache, pipeline_depth, context
+        ):
+            key = os.path.relpath(from_path, dir_path_content)
+            if output_identity(dest_path) != previous_outputs[dest_path]:
+                changed += 1
+            output = os.path.relpath(dest_path, dest_dir_path)
+            manifest.record(key, from_path, source_hashes[from_path], inputs, output)
+            if search_index is not None:
+                update_search_index(search_index, from_path, dest_path, dir_path_content, dest_dir_path, search_entry)
+            generated += 1
+        if only is None:
+            stale_keys = manifest.entries.keys() - seen
+        else:
+            stale_keys = {os.path.relpath(path, dir_path_content) for path in only} & manifest.entries.keys() - seen
+        if shard is not None:
+            # pages of the other shards were not looked at, so they are not stale
+            stale_keys = {key for key in stale_keys if shard_of(key.replace(os.sep, "/"), count) == index}
+        removed = remove_stale_outputs(manifest, stale_keys, dest_dir_path)
+        if search_index is not None:
+            for key in stale_keys:
+                search_index.remove(key)
+            search_index.write(dest_dir_path)
+    finally:
+        manifest.save()
+        if search_index is not None:
+            search_index.save()
+    if profile is not None:
+        profile.pages_changed = changed
+    print(f"Generated {generated} of {len(pages)} pages, {changed} changed, removed {removed} stale outputs")
+    return pages
+
+
+def build_pages(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    jobs: int = 1,
+    profile: BuildProfile = None,
+    block_cache: BlockCache = None,
+    pipeline_depth: int = 0,
+    context: RenderContext = None,
+) -> Iterator[tuple[tuple[str, str], None | dict]]:
+    if pipeline_depth > 0 and jobs <= 1:
+        yield from build_pages_pipelined(pages, template_path, pipeline_depth, profile, block_cache, context)
+        return
+    if jobs <= 1 or len(pages) <= 1:
+        for from_path, dest_path in pages:
+            page_profile = None if profile is None else PageProfile(from_path)
+            search_entry = generate_page(from_path, template_path, dest_path, page_profile, block_cache, context)
+            if profile is not None:
+                profile.add_page(page_profile)
+            yield (from_path, dest_path), search_entry
+        return
+    logs = {}
+    error = None
+    largest_first = sorted(pages, key=lambda page: os.path.getsize(page[0]), reverse=True)
+    # workers start from the parent's entries and send back their counts and new entries with every page
+    cache_args = None if block_cache is None else (
+        block_cache.max_size, block_cache.salt, list(block_cache.entries.items())
+    )
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(cache_args, context)) as executor:
+        futures = {
+            executor.submit(_generate_page_job, from_path, template_path, dest_path, profile is not None):
+                (from_path, dest_path)
+            for from_path, dest_path in largest_first
+        }
+        for future in as_completed(futures):
+            page = futures[future]
+            try:
+                logs[page], page_profile, search_entry, cache_stats = future.result()
+            except Exception as e:
+                error = error or e
+                continue
+            if block_cache is not None:
+                block_cache.merge(*cache_stats)
+            if profile is not None:
+                profile.add_page(page_profile)
+            yield page, search_entry
+    for page in pages:
+        if page in logs:
+            print(logs[page], end="")
+    if error is not None:
+        raise error
+
+
+_worker_block_cache = None
+_worker_context = None
+
+
+def _init_worker(cache_args: tuple[int, str, list[tuple[str, tuple[str, int, int]]]], context: RenderContext) -> None:
+    global _worker_block_cache, _worker_context
+    _worker_context = context
+    if cache_args is None:
+        return
+    max_size, salt, entries = cache_args
+    _worker_block_cache = BlockCache(max_size, salt=salt)
+    _worker_block_cache.entries.update(entries)
+    _worker_block_cache.new_keys = []
+
+
+def _generate_page_job(
+    from_path: str,
+    template_path: str,
+    dest_path: str,
+    profiled: bool,
+) -> tuple[str, None | dict, None | dict, None | tuple[int, int, list[tuple[str, tuple[str, int, int]]]]]:
+    log = io.StringIO()
+    page_profile = PageProfile(from_path) if profiled else None
+    cache = _worker_block_cache
+    hits, misses = (0, 0) if cache is None else (cache.hits, cache.misses)
+    with contextlib.redirect_stdout(log):
+        search_entry = generate_page(from_path, template_path, dest_path, page_profile, cache, _worker_context)
+    cache_stats = None if cache is None else (cache.hits - hits, cache.misses - misses, cache.take_new_entries())
+    return log.getvalue(), None if page_profile is None else page_profile.to_dict(), search_entry, cache_stats
+
+
+def find_pages(dir_path_content: str, dest_dir_path: str) -> list[tuple[str, str]]:
+    # an explicit stack, so the depth of the content tree is not limited by the recursion limit
+    pages = []
+    directories = [(dir_path_content, dest_dir_path)]
+    while directories:
+        content_dir, dest_dir = directories.pop()
+        for item in sorted(os.listdir(content_dir), reverse=True):
+            item_path = os.path.join(content_dir, item)
+            if os.path.isdir(item_path):
+                directories.append((item_path, os.path.join(dest_dir, item)))
+            elif item.endswith(".md"):
+                pages.append((item_path, os.path.join(dest_dir, item[:-2] + "html")))
+    return pages
+
+
+def update_search_index(
+    search_index: SearchIndex,
+    from_path: str,
+    dest_path: str,
+    dir_path_content: str,
+    dest_dir_path: str,
+    search_entry: dict,
+) -> None:
+    key = os.path.relpath(from_path, dir_path_content)
+    url = page_url(os.path.relpath(dest_path, dest_dir_path))
+    search_index.update(key, url, search_entry["title"], search_entry["terms"])
+
+
+def page_dest_path(from_path: str, dir_path_content: str, dest_dir_path: str) -> str:
+    return os.path.join(dest_dir_path, os.path.relpath(from_path, dir_path_content)[:-2] + "html")
+
+
+def remove_stale_outputs(manifest: BuildManifest, stale_keys: set[str], dest_dir_path: str) -> int:
+    removed = 0
+    for key in sorted(stale_keys):
+        output_path = os.path.join(dest_dir_path, manifest.entries[key]["output"])
+        if os.path.isfile(output_path):
+            os.remove(output_path)
+            removed += 1
+            remove_empty_parents(os.path.dirname(output_path), dest_dir_path)
+        manifest.forget(key)
+    return removed
+
@@ -0,0 +1,194 @@
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+from block_cache import BlockCache
+from file_utils import make_directories, remove_tree
+from generate_pages_recursive import find_pages, generate_pages_recursive
+from render_context import RenderContext
+from test_helpers import TempDirTestCase, read_file, write_file
+
+
+class GeneratePagesRecursiveTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, ".build", "manifest.json")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nHello")
+
+    def build(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest)
+
+    def test_it_generates_all_pages_on_the_first_build(self):
+        self.build()
+
+        self.assertEqual("<title>Home</title><div><h1>Home</h1><p>Welcome</p></div>", read_file(os.path.join(self.public, "index.html")))
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "blog", "post", "index.html")))
+
+    def test_it_skips_unchanged_pages(self):
+        self.build()
+        write_file(os.path.join(self.public, "index.html"), "untouched")
+
+        self.build()
+
+        self.assertEqual("untouched", read_file(os.path.join(self.public, "index.html")))
+
+    def test_it_regenerates_changed_pages_only(self):
+        self.build()
+        write_file(os.path.join(self.public, "index.html"), "untouched")
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nChanged")
+
+        self.build()
+
+        self.assertEqual("untouched", read_file(os.path.join(self.public, "index.html")))
+        self.assertIn("Changed", read_file(os.path.join(self.public, "blog", "post", "index.html")))
+
+    def test_it_regenerates_missing_outputs(self):
+        self.build()
+        os.remove(os.path.join(self.public, "index.html"))
+
+        self.build()
+
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "index.html")))
+
+    def test_it_rebuilds_everything_when_the_template_changes(self):
+        self.build()
+        write_file(os.path.join(self.public, "index.html"), "untouched")
+        write_file(self.template, "<h1>{{ Title }}</h1>{{ Content }}")
+
+        self.build()
+
+        self.assertTrue(read_file(os.path.join(self.public, "index.html")).startswith("<h1>Home</h1>"))
+
+    def test_it_regenerates_pages_when_a_static_image_changes(self):
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\n![Logo](/logo.png)")
+        for size in ((10, 20), (30, 40)):
+            context = RenderContext(image_sizes={"/logo.png": size})
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_pages_recursive(self.content, self.template, self.public, self.manifest, context=context)
+
+        self.assertIn('width="30" height="40"', read_file(os.path.join(self.public, "index.html")))
+
+    def test_it_leaves_identical_outputs_untouched(self):
+        self.build()
+        index_path = os.path.join(self.public, "index.html")
+        os.utime(index_path, ns=(1, 1))
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome\n")
+        write_file(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\nChanged")
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest)
+
+        self.assertEqual(1, os.stat(index_path).st_mtime_ns)
+        self.assertIn("Generated 2 of 2 pages, 1 changed", output.getvalue())
+
+    def test_it_finds_pages_deeper_than_the_recursion_limit(self):
+        depth = sys.getrecursionlimit() + 100
+        deep_dir = os.path.join(self.content, *["d"] * depth)
+        make_directories(deep_dir)
+        write_file(os.path.join(deep_dir, "index.md"), "# Deep")
+        deep_output = os.path.join(self.public, *["d"] * depth, "index.html")
+
+        try:
+            self.assertIn(deep_output, [dest for _, dest in find_pages(self.content, self.public)])
+            self.build()
+            self.assertIn("<h1>Deep</h1>", read_file(deep_output))
+        finally:
+            # the temporary directory's own cleanup recurses once per directory level
+            remove_tree(os.path.join(self.content, "d"))
+            if os.path.isdir(os.path.join(self.public, "d")):
+                remove_tree(os.path.join(self.public, "d"))
+
+    def test_it_removes_outputs_of_deleted_sources(self):
+        self.build()
+        os.remove(os.path.join(self.content, "blog", "post", "index.md"))
+
+        self.build()
+
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "index.html")))
+
+    def test_it_only_considers_the_given_sources(self):
+        self.build()
+        write_file(os.path.join(self.public, "index.html"), "untouched")
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        write_file(post, "# Post\n\nChanged")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nChanged")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest, only=[post])
+
+        self.assertEqual("untouched", read_file(os.path.join(self.public, "index.html")))
+        self.assertIn("Changed", read_file(os.path.join(self.public, "blog", "post", "index.html")))
+
+    def test_it_removes_outputs_of_given_deleted_sources(self):
+        self.build()
+        post = os.path.join(self.content, "blog", "post", "index.md")
+        os.remove(post)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest, only=[post])
+
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog")))
+
+    def test_it_works_without_a_manifest(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public)
+
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "index.html")))
+        self.assertFalse(os.path.exists(self.manifest))
+
+    def test_parallel_build_matches_serial_build(self):
+        serial = os.path.join(self.tmp.name, "serial")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, serial)
+        log = io.StringIO()
+
+        with contextlib.redirect_stdout(log):
+            generate_pages_recursive(self.content, self.template, self.public, jobs=2)
+
+        for page in ["index.html", os.path.join("blog", "post", "index.html")]:
+            self.assertEqual(read_file(os.path.join(serial, page)), read_file(os.path.join(self.public, page)))
+        self.assertEqual(2, log.getvalue().count("Generating page from"))
+
+    def test_parallel_build_merges_worker_block_caches(self):
+        cache = BlockCache(path=os.path.join(self.tmp.name, ".build", "blocks.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, jobs=2, block_cache=cache)
+
+        self.assertEqual((0, 4), (cache.hits, cache.misses))
+        self.assertEqual(4, len(cache))
+        cache.save()
+        self.assertEqual(4, len(BlockCache.load(cache.path)))
+
+    def test_pipelined_build_matches_serial_build(self):
+        for i in range(10):
+            write_file(os.path.join(self.content, "many", f"{i}.md"), f"# Page {i}\n\n- item **{i}**")
+        serial = os.path.join(self.tmp.name, "serial")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, serial)
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest, pipeline_depth=1)
+
+        for i in range(10):
+            page = os.path.join("many", f"{i}.html")
+            self.assertEqual(read_file(os.path.join(serial, page)), read_file(os.path.join(self.public, page)))
+
+    def test_pipelined_build_reports_errors_after_writing_other_pages(self):
+        write_file(os.path.join(self.content, "broken.md"), "no title")
+
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(ValueError):
+            generate_pages_recursive(self.content, self.template, self.public, self.manifest, pipeline_depth=2)
+
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "index.html")))
+        self.assertTrue(os.path.isfile(os.path.join(self.public, "blog", "post", "index.html")))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
-from functools import reduce
+import sys
+from typing import Iterator, TextIO
 
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str = None,
@@ -9,31 +12,59 @@ class HTMLNode:
         children: list['HTMLNode'] = None,
         props: dict[str, str] = None,
     ):
-        self.tag = tag
+        self.tag = None if tag is None else sys.intern(tag)
         self.value = value
         self.children = children
-        self.props = props
+        self.props = props or None
 
     def to_html(self) -> str:
-        if not self.children:
-            return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
-        children_html = reduce(lambda html, child: f"{html}{child.to_html()}", self.children, "")
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+        return "".join(self.iter_html())
+
+    def write_html(self, file: TextIO) -> None:
+        file.writelines(self.iter_html())
+
+    def iter_html(self) -> Iterator[str]:
+        # an explicit stack rather than recursion, so nesting depth is not limited by the recursion limit
+        stack = [(iter((self,)), None)]
+        while stack:
+            siblings, closing_tag = stack[-1]
+            for node in siblings:
+                children = node.children
+                if not children:
+                    yield node.childless_html()
+                    continue
+                for child in children:
+                    if child.children:
+                        yield f"<{node.tag}{node.props_to_html()}>"
+                        stack.append((iter(children), f"</{node.tag}>"))
+                        break
+                else:
+                    # the common case of a block holding only inline leaves is rendered in one piece
+                    leaves = "".join([child.childless_html() for child in children])
+                    yield f"<{node.tag}{node.props_to_html()}>{leaves}</{node.tag}>"
+                    continue
+                # descend; this level's iterator picks up after the node once its children are done
+                break
+            else:
+                stack.pop()
+                if closing_tag is not None:
+                    yield closing_tag
+
+    def childless_html(self) -> str:
+        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
     def props_to_html(self):
-        if self.props is None:
+        if not self.props:
             return ""
-        return reduce(
-            lambda html, prop: f"{html} {prop[0]}=\"{prop[1]}\"",
-            list(self.props.items()),
-            "",
-        )
+        return "".join([f" {name}=\"{value}\"" for name, value in self.props.items()])
 
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, {self.children}, {self.props})"
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: None|str,
@@ -44,7 +75,7 @@ class LeafNode(HTMLNode):
             raise ValueError("All leaf nodes must have a value.")
         super().__init__(tag=tag, value=value, props=props)
 
-    def to_html(self):
+    def childless_html(self) -> str:
         if self.tag is None:
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
@@ -54,6 +85,8 @@ class LeafNode(HTMLNode):
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: None|str,
@@ -66,11 +99,8 @@ class ParentNode(HTMLNode):
             raise ValueError("All parent nodes must have children.")
         super().__init__(tag=tag, children=children, props=props)
 
-    def to_html(self):
-        if isinstance(self, LeafNode):
-            return self.to_html()
-        content = reduce(lambda html, child: f"{html}{child.to_html()}", self.children, "")
-        return f"<{self.tag}{self.props_to_html()}>{content}</{self.tag}>"
+    def childless_html(self) -> str:
+        return f"<{self.tag}{self.props_to_html()}></{self.tag}>"
 
     def __repr__(self):
-        return f"ParentNode({self.tag}, {self.children}, {self.props})"
\ No newline at end of file
+        return f"ParentNode({self.tag}, {self.children}, {self.props})"
@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from html_node import HTMLNode
@@ -93,3 +94,38 @@ class HTMLNodeTest(unittest.TestCase):
         ])
         html = node.to_html()
         self.assertEqual(html, "<div><div></div></div>")
+
+    def test_html_node_without_children_to_html(self):
+        node = HTMLNode(tag="div", children=[])
+        self.assertEqual(node.to_html(), "<div>None</div>")
+
+    def test_iter_html_yields_chunks_of_to_html(self):
+        node = ParentNode("ul", [
+            ParentNode("li", [LeafNode(None, "one "), LeafNode("b", "two")]),
+            LeafNode("li", "three", props={"class": "last"}),
+        ])
+        chunks = list(node.iter_html())
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual("".join(chunks), '<ul><li>one <b>two</b></li><li class="last">three</li></ul>')
+
+    def test_write_html(self):
+        node = ParentNode("p", [LeafNode(None, "Hello "), LeafNode("i", "World")])
+        file = io.StringIO()
+        node.write_html(file)
+        self.assertEqual(file.getvalue(), "<p>Hello <i>World</i></p>")
+
+    def test_to_html_with_deeply_nested_parents(self):
+        node = LeafNode("b", "deep")
+        for _ in range(10000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 10000 * len("<span></span>") + len("<b>deep</b>"))
+
+    def test_nodes_have_no_instance_dict(self):
+        for node in [HTMLNode("div"), LeafNode("b", "bold"), ParentNode("p", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
+    def test_tags_are_interned(self):
+        level = 2
+        self.assertIs(LeafNode(f"h{level}", "a").tag, LeafNode("".join(["h", "2"]), "b").tag)
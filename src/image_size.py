@@ -0,0 +1,108 @@
+import json
+import os
+import struct
+from typing import BinaryIO
+
+IMAGE_EXTENSIONS = frozenset((".png", ".jpg", ".jpeg", ".gif"))
+INDEX_FORMAT = 1
+# start-of-frame markers carry the frame size; C4, C8 and CC share the range but mean something else
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+def read_image_size(path: str) -> None | tuple[int, int]:
+    with open(path, "rb") as file:
+        header = file.read(26)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header.startswith(b"\xff\xd8"):
+            file.seek(2)
+            return read_jpeg_size(file)
+    return None
+
+
+def read_jpeg_size(file: BinaryIO) -> None | tuple[int, int]:
+    while True:
+        byte = file.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = file.read(1)
+        while marker == b"\xff":
+            marker = file.read(1)
+        if not marker:
+            return None
+        marker = marker[0]
+        if marker in JPEG_STANDALONE_MARKERS or marker == 0x00:
+            continue
+        length_bytes = file.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if marker in JPEG_SOF_MARKERS:
+            frame = file.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        if marker == 0xDA:
+            return None
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+class ImageIndex:
+    def __init__(self, path: str = None, entries: dict[str, list[int]] = None):
+        self.path = path
+        self.entries = entries or {}
+
+    @classmethod
+    def load(cls, path: str) -> 'ImageIndex':
+        if not os.path.isfile(path):
+            return cls(path)
+        with open(path) as file:
+            data = json.load(file)
+        if data.get("format") != INDEX_FORMAT:
+            return cls(path)
+        return cls(path, data["entries"])
+
+    def save(self) -> None:
+        if self.path is None:
+            raise ValueError("ImageIndex has no path to save to")
+        dirpath = os.path.dirname(self.path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"format": INDEX_FORMAT, "entries": self.entries}, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def scan(self, static_dir: str) -> dict[str, tuple[int, int]]:
+        entries = {}
+        directories = [static_dir] if os.path.isdir(static_dir) else []
+        while directories:
+            with os.scandir(directories.pop()) as dir_entries:
+                for entry in dir_entries:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir():
+                        directories.append(entry.path)
+                        continue
+                    if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                        continue
+                    key = "/" + os.path.relpath(entry.path, static_dir).replace(os.sep, "/")
+                    stat = entry.stat()
+                    cached = self.entries.get(key)
+                    if cached is not None and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+                        entries[key] = cached
+                        continue
+                    size = read_image_size(entry.path)
+                    if size is not None:
+                        entries[key] = [stat.st_mtime_ns, stat.st_size, *size]
+        self.entries = entries
+        return self.sizes()
+
+    def sizes(self) -> dict[str, tuple[int, int]]:
+        return {key: (entry[2], entry[3]) for key, entry in self.entries.items()}
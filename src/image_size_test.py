@@ -0,0 +1,77 @@
+import os
+import struct
+import unittest
+
+from block_cache import BlockCache
+from image_size import ImageIndex, read_image_size
+from render_context import RenderContext
+from test_helpers import TempDirTestCase, write_file
+from utils import markdown_to_html_node
+
+PNG = b"\x89PNG\r\n\x1a\n" + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 928, 468) + b"\x08\x06\x00\x00\x00"
+GIF = b"GIF89a" + struct.pack("<HH", 32, 24) + b"\x00" * 8
+JPEG = (
+    b"\xff\xd8"
+    + b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    + b"\xff\xc2" + struct.pack(">H", 17) + b"\x08" + struct.pack(">HH", 8, 16) + b"\x03" + b"\x00" * 9
+)
+
+
+class ImageSizeTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = os.path.join(self.tmp.name, "static")
+
+    def write(self, relpath, data):
+        return write_file(os.path.join(self.static, relpath), data)
+
+    def test_it_reads_header_dimensions(self):
+        self.assertEqual((928, 468), read_image_size(self.write("tom.png", PNG)))
+        self.assertEqual((32, 24), read_image_size(self.write("ring.gif", GIF)))
+        self.assertEqual((16, 8), read_image_size(self.write("map.jpg", JPEG)))
+        self.assertIsNone(read_image_size(self.write("notes.png", b"not an image")))
+
+    def test_index_reuses_entries_with_matching_mtime(self):
+        path = self.write(os.path.join("images", "tom.png"), PNG)
+        index_path = os.path.join(self.tmp.name, ".build", "images.json")
+        index = ImageIndex(index_path)
+        self.assertEqual({"/images/tom.png": (928, 468)}, index.scan(self.static))
+        index.save()
+
+        index = ImageIndex.load(index_path)
+        index.entries["/images/tom.png"][2:] = [1, 1]
+        self.assertEqual({"/images/tom.png": (1, 1)}, index.scan(self.static))
+
+        os.utime(path, ns=(0, 0))
+        self.assertEqual({"/images/tom.png": (928, 468)}, index.scan(self.static))
+
+
+class ImageAttributesTest(unittest.TestCase):
+    markdown = "![Tom](/images/tom.png)\n\n![Map](/images/map.png)\n\n![Tom](/images/tom.png)"
+
+    def test_images_get_dimensions_and_lazy_loading_below_the_first(self):
+        context = RenderContext(image_sizes={"/images/tom.png": (928, 468)})
+
+        html = markdown_to_html_node(self.markdown, context=context).to_html()
+
+        self.assertEqual(
+            '<div>'
+            '<p><img src="/images/tom.png" alt="Tom" width="928" height="468"></img></p>'
+            '<p><img src="/images/map.png" alt="Map" loading="lazy" decoding="async"></img></p>'
+            '<p><img src="/images/tom.png" alt="Tom" width="928" height="468" loading="lazy" decoding="async"></img></p>'
+            '</div>',
+            html,
+        )
+
+    def test_block_cache_keeps_the_first_image_eager(self):
+        context = RenderContext(image_sizes={"/images/tom.png": (928, 468)})
+        cache = BlockCache()
+        expected = markdown_to_html_node(self.markdown, context=context).to_html()
+
+        self.assertEqual(expected, markdown_to_html_node(self.markdown, cache, context).to_html())
+        self.assertEqual(expected, markdown_to_html_node(self.markdown, cache, context).to_html())
+        self.assertEqual(2, cache.hits)
+
+
+if __name__ == '__main__':
+    unittest.main()
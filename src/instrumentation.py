@@ -0,0 +1,137 @@
+import json
+import os
+import time
+from typing import Iterable, Iterator
+
+from html_node import HTMLNode
+
+PAGE_PHASES = ("read", "parse", "inline", "render", "template", "write")
+CPU_PHASES = ("parse", "inline", "render", "template")
+
+
+class PageProfile:
+    def __init__(self, path: str):
+        self.path = path
+        self.phases = dict.fromkeys(PAGE_PHASES, 0.0)
+        self.nodes = 0
+        self.output_bytes = 0
+        self.bytes_saved = 0
+        self.phase = None
+        self.phase_started = 0.0
+
+    def add(self, phase: str, seconds: float) -> None:
+        self.phases[phase] += seconds
+
+    def enter(self, phase: None | str) -> None | str:
+        # the time since the last switch goes to the phase that was running, so nested phases are not counted twice
+        now = time.perf_counter()
+        if self.phase is not None:
+            self.phases[self.phase] += now - self.phase_started
+        previous, self.phase, self.phase_started = self.phase, phase, now
+        return previous
+
+    def timed(self, phase: str, iterable: Iterable) -> Iterator:
+        # the phases of a streamed page interleave, so each item is timed as it is pulled
+        iterator = iter(iterable)
+        while True:
+            previous = self.enter(phase)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.enter(previous)
+            yield item
+
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "seconds": self.total(),
+            "phases": self.phases,
+            "nodes": self.nodes,
+            "output_bytes": self.output_bytes,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+class BuildProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages = []
+        self.pages_changed = None
+        self.copy = None
+
+    def add_page(self, page: PageProfile | dict) -> None:
+        self.pages.append(page.to_dict() if isinstance(page, PageProfile) else page)
+
+    def add_copy(self, stats: dict[str, int], seconds: float) -> None:
+        self.copy = {"seconds": seconds, **stats}
+
+    def report(self) -> dict:
+        phases = dict.fromkeys(PAGE_PHASES, 0.0)
+        for page in self.pages:
+            for phase, seconds in page["phases"].items():
+                phases[phase] += seconds
+        copy_seconds = self.copy["seconds"] if self.copy else 0.0
+        cpu_seconds = sum(phases[phase] for phase in CPU_PHASES)
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "cpu_seconds": cpu_seconds,
+            "io_seconds": phases["read"] + phases["write"] + copy_seconds,
+            "phases": phases,
+            "pages": len(self.pages),
+            "pages_changed": self.pages_changed,
+            "nodes": sum(page["nodes"] for page in self.pages),
+            "output_bytes": sum(page["output_bytes"] for page in self.pages),
+            "bytes_saved": sum(page["bytes_saved"] for page in self.pages),
+            "copy": self.copy,
+            "page_profiles": sorted(self.pages, key=lambda page: page["seconds"], reverse=True),
+        }
+
+    def write(self, path: str) -> dict:
+        report = self.report()
+        dirpath = os.path.dirname(path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        with open(path, "w") as file:
+            json.dump(report, file, indent=1)
+        return report
+
+    @staticmethod
+    def summary(report: dict, top: int = 10) -> str:
+        lines = [
+            f"Build report: {report['pages']} pages, {report['nodes']} nodes, {report['output_bytes']} bytes written",
+            f"  wall {report['wall_seconds'] * 1000:.1f} ms, cpu {report['cpu_seconds'] * 1000:.1f} ms, "
+            f"io {report['io_seconds'] * 1000:.1f} ms",
+            "  " + ", ".join(f"{phase} {seconds * 1000:.1f} ms" for phase, seconds in report["phases"].items()),
+        ]
+        if report.get("pages_changed") is not None:
+            lines.append(f"  {report['pages_changed']} of {report['pages']} pages changed on disk")
+        if report["bytes_saved"]:
+            saved = report["bytes_saved"]
+            lines.append(f"  minified: {saved} bytes saved ({saved / (report['output_bytes'] + saved):.1%})")
+        if report["copy"]:
+            copy = report["copy"]
+            lines.append(
+                f"  static: {copy['copied']} copied, {copy['linked']} linked, {copy['unchanged']} unchanged, "
+                f"{copy['removed']} removed, {copy['bytes']} bytes in {copy['seconds'] * 1000:.1f} ms"
+            )
+        if report["page_profiles"]:
+            lines.append(f"  slowest {min(top, len(report['page_profiles']))} pages:")
+        for page in report["page_profiles"][:top]:
+            lines.append(f"    {page['seconds'] * 1000:8.2f} ms {page['nodes']:7} nodes  {page['path']}")
+        return "\n".join(lines)
+
+
+def count_nodes(root: HTMLNode) -> int:
+    count = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children:
+            stack.extend(node.children)
+    return count
@@ -0,0 +1,102 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from block_cache import BlockCache
+from generate_page import generate_page
+from html_node import LeafNode, ParentNode
+from instrumentation import PAGE_PHASES, BuildProfile, PageProfile, count_nodes
+from render_context import RenderContext
+from test_helpers import read_file, write_file
+
+
+class InstrumentationTest(unittest.TestCase):
+    def test_count_nodes(self):
+        node = ParentNode("ul", [ParentNode("li", [LeafNode(None, "a"), LeafNode("b", "b")]), LeafNode("li", "c")])
+        self.assertEqual(5, count_nodes(node))
+
+    def test_generate_page_records_a_profile(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "public", "index.html")
+            write_file(source, "# Title\n\nSome **bold** text")
+            write_file(template, "{{ Title }}{{ Content }}")
+            profile = PageProfile(source)
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, dest, profile)
+
+            html = read_file(dest)
+        self.assertEqual("Title<div><h1>Title</h1><p>Some <b>bold</b> text</p></div>", html)
+        self.assertEqual(len(html), profile.output_bytes)
+        self.assertEqual(6, profile.nodes)
+        self.assertGreater(profile.phases["inline"], 0)
+        self.assertGreater(profile.total(), 0)
+
+    def test_node_counts_do_not_depend_on_minifying_or_caching(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            write_file(source, "# Title\n\nSome **bold** text\n\nSome **bold** text")
+            write_file(template, "{{ Title }}{{ Content }}")
+            cache = BlockCache()
+            counts = []
+            for block_cache, context in ((None, None), (cache, RenderContext(minify="safe")), (cache, None), (cache, None)):
+                profile = PageProfile(source)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    generate_page(source, template, os.path.join(tmp, "index.html"), profile, block_cache, context)
+                counts.append(profile.nodes)
+
+        self.assertEqual([10, 10, 10, 10], counts)
+        self.assertGreater(cache.hits, 0)
+
+    def test_profiled_pages_are_the_pages_the_build_writes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "index.md")
+            template = os.path.join(tmp, "template.html")
+            dest = os.path.join(tmp, "index.html")
+            write_file(source, "# Title\n\nSome **bold** text\n\n- a\n- b\n\nSome **bold** text")
+            write_file(template, "<html>\n<body>\n<h1>{{ Title }}</h1>\n{{ Content }}\n</body>\n</html>\n")
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_page(source, template, dest)
+                plain_bytes = os.path.getsize(dest)
+                for minify in ("fast", "safe"):
+                    cache = BlockCache()
+                    for block_cache in (None, cache, cache):
+                        generate_page(source, template, dest, None, block_cache, RenderContext(minify=minify))
+                        html = read_file(dest)
+                        profile = PageProfile(source)
+                        generate_page(source, template, dest, profile, block_cache, RenderContext(minify=minify))
+
+                        self.assertEqual(html, read_file(dest))
+                        self.assertEqual(len(html.encode()), profile.output_bytes)
+                        self.assertEqual(plain_bytes - profile.output_bytes, profile.bytes_saved)
+                        self.assertGreater(profile.bytes_saved, 0)
+
+        self.assertGreater(cache.hits, 0)
+        self.assertEqual(set(PAGE_PHASES) - {"inline"}, {phase for phase, seconds in profile.phases.items() if seconds > 0})
+
+    def test_report_aggregates_pages_and_copy_stats(self):
+        profile = BuildProfile()
+        for path, seconds in [("fast.md", 0.001), ("slow.md", 0.005)]:
+            page = PageProfile(path)
+            page.add("parse", seconds)
+            page.nodes = 10
+            profile.add_page(page)
+        profile.add_copy({"copied": 1, "linked": 0, "unchanged": 2, "removed": 0, "bytes": 100}, 0.002)
+
+        report = profile.report()
+
+        self.assertEqual(["slow.md", "fast.md"], [page["path"] for page in report["page_profiles"]])
+        self.assertAlmostEqual(0.006, report["cpu_seconds"])
+        self.assertAlmostEqual(0.002, report["io_seconds"])
+        self.assertEqual(20, report["nodes"])
+        self.assertIn("slow.md", BuildProfile.summary(report, top=1))
+        self.assertNotIn("fast.md", BuildProfile.summary(report, top=1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import os
+from html import escape
+
+from file_utils import replace_if_changed, temporary_path
+from html_node import LeafNode, ParentNode
+from metadata import MetadataIndex
+from render_context import RenderContext
+from template import load_template
+
+BLOG_SECTION = "blog"
+FEED_NAME = "feed.xml"
+SITEMAP_NAME = "sitemap.xml"
+
+
+def listings_digest(index: MetadataIndex, site_url: str, template_path: str, context: RenderContext = None) -> str:
+    digest = hashlib.sha256()
+    digest.update(json.dumps([entry["metadata"] for _, entry in sorted(index.entries.items())], sort_keys=True).encode())
+    digest.update(site_url.encode())
+    digest.update(load_template(template_path).source.encode())
+    digest.update(("" if context is None else context.salt).encode())
+    return digest.hexdigest()
+
+
+def write_listings(
+    index: MetadataIndex,
+    site_url: str,
+    template_path: str,
+    dest_dir_path: str,
+    context: RenderContext = None,
+) -> bool:
+    site_url = site_url.rstrip("/")
+    outputs = [os.path.join(dest_dir_path, SITEMAP_NAME), os.path.join(dest_dir_path, BLOG_SECTION, FEED_NAME)]
+    blog_index = index.get(f"{BLOG_SECTION}/index.md") is None
+    if blog_index:
+        outputs.append(os.path.join(dest_dir_path, BLOG_SECTION, "index.html"))
+    # the listings only read page metadata, so they are left alone until some of it changes
+    digest = listings_digest(index, site_url, template_path, context)
+    if digest == index.listings_digest and all(os.path.isfile(path) for path in outputs):
+        return False
+
+    posts = index.pages(BLOG_SECTION, include_index=False)
+    write_text(outputs[0], render_sitemap(index.pages(), site_url))
+    write_text(outputs[1], render_feed(posts, site_url, f"/{BLOG_SECTION}/{FEED_NAME}"))
+    if blog_index:
+        template = load_template(template_path)
+        if context is not None:
+            template = context.template(template)
+        write_text(outputs[2], template.render(Title="Blog", Content=render_post_list(posts, "Blog")))
+    index.listings_digest = digest
+    print(f"Wrote listings for {len(posts)} posts")
+    return True
+
+
+def render_post_list(posts: list[dict[str, str]], title: str) -> str:
+    items = [
+        ParentNode("li", [LeafNode("a", escape(post["title"], quote=False), {"href": escape(post["url"])})])
+        for post in posts
+    ]
+    children = [LeafNode("h1", escape(title, quote=False))]
+    if items:
+        children.append(ParentNode("ul", items))
+    return ParentNode("div", children).to_html()
+
+
+def render_sitemap(pages: list[dict[str, str]], site_url: str) -> str:
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for page in sorted(pages, key=lambda page: page["url"]):
+        lines.append(f"<url><loc>{escape(site_url + page['url'])}</loc><lastmod>{escape(page['updated'])}</lastmod></url>")
+    lines.append("</urlset>")
+    return "\n".join(lines) + "\n"
+
+
+def render_feed(posts: list[dict[str, str]], site_url: str, feed_path: str) -> str:
+    updated = max((post["updated"] for post in posts), default="1970-01-01T00:00:00Z")
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<feed xmlns="http://www.w3.org/2005/Atom">',
+        f"<title>{escape(BLOG_SECTION.capitalize())}</title>",
+        f"<id>{escape(site_url + feed_path)}</id>",
+        f'<link rel="self" href="{escape(site_url + feed_path)}"/>',
+        f'<link href="{escape(site_url + "/" + BLOG_SECTION + "/")}"/>',
+        f"<updated>{escape(updated)}</updated>",
+    ]
+    for post in posts:
+        url = escape(site_url + post["url"])
+        lines.append("<entry>")
+        lines.append(f"<title>{escape(post['title'])}</title>")
+        lines.append(f'<link href="{url}"/>')
+        lines.append(f"<id>{url}</id>")
+        lines.append(f"<updated>{escape(post['updated'])}</updated>")
+        if post.get("description"):
+            lines.append(f"<summary>{escape(post['description'])}</summary>")
+        lines.append("</entry>")
+    lines.append("</feed>")
+    return "\n".join(lines) + "\n"
+
+
+def write_text(path: str, text: str) -> None:
+    dirpath = os.path.dirname(path)
+    if not os.path.isdir(dirpath):
+        os.makedirs(dirpath)
+    tmp_path = temporary_path(path)
+    with open(tmp_path, "w") as file:
+        file.write(text)
+    replace_if_changed(tmp_path, path)
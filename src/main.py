@@ -1,17 +1,244 @@
+import argparse
+import os
+import threading
+import time
+
 from base_path import base_path
-from copy_contents import copy_contents
-from generate_pages_recursive import generate_pages_recursive
+from block_cache import BlockCache
+from copy_contents import LINK_MODES, copy_contents
+from etags import remove_etags, write_etags
+from fingerprint import fingerprint_assets, load_asset_urls
+from generate_pages_recursive import find_pages, generate_pages_recursive
+from image_size import ImageIndex
+from instrumentation import BuildProfile
+from listings import write_listings
+from metadata import MetadataIndex
+from minify import MINIFY_MODES
+from precompress import precompress_tree
+from render_context import RenderContext
+from search_index import SearchIndex
+from serve import create_server
+from shard import merge_shards, parse_shard, shard_key, write_shard_manifest
+from staging import StagedOutput, live_output
+from watch import PollingWatcher
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description="Build the static site into public/")
+    parser.add_argument("command", nargs="?", choices=("build", "serve", "merge"), default="build")
+    parser.add_argument("shard_dirs", nargs="*", metavar="SHARD_DIR", help="shard outputs to combine (merge only)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of worker processes for page generation")
+    parser.add_argument(
+        "--pipeline",
+        type=int,
+        default=0,
+        metavar="DEPTH",
+        help="overlap reads and writes with parsing using queues of this depth (serial builds only)",
+    )
+    parser.add_argument(
+        "--stage",
+        action="store_true",
+        help="build into a hardlinked copy of public/ and swap it in atomically once the build succeeds",
+    )
+    parser.add_argument("--checksum", action="store_true", help="compare static files by content hash, not just mtime")
+    parser.add_argument("--link", choices=LINK_MODES, help="hardlink or reflink changed static files instead of copying")
+    parser.add_argument("--port", type=int, default=8888, help="port for the serve command")
+    parser.add_argument("--quiet", action="store_true", help="do not log every request while serving")
+    parser.add_argument("--watch", action="store_true", help="rebuild changed pages and assets while serving")
+    parser.add_argument("--fingerprint", action="store_true", help="serve static files under content-hashed names")
+    parser.add_argument(
+        "--minify",
+        choices=MINIFY_MODES,
+        help="minify the generated HTML; safe checks every minified block against its original",
+    )
+    parser.add_argument("--search", action="store_true", help="write a prefix-sharded search index to public/search/")
+    parser.add_argument(
+        "--site-url",
+        metavar="URL",
+        help="write sitemap.xml, the blog feed and the blog index using this absolute site URL",
+    )
+    parser.add_argument("--precompress", action="store_true", help="write .gz (and .br) siblings of compressible outputs")
+    parser.add_argument("--block-cache", type=int, default=0, help="memoize up to N rendered blocks (0 disables)")
+    parser.add_argument("--persist-block-cache", action="store_true", help="keep the block cache between builds")
+    parser.add_argument("--report", help="write a JSON build profile to this file")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest pages in the report summary")
+    parser.add_argument("--shard", type=parse_shard, metavar="i/N", help="build only the i-th of N page partitions")
+    args = parser.parse_args(argv)
+    if args.shard_dirs and args.command != "merge":
+        parser.error("shard directories are only accepted by the merge command")
+    if args.command == "merge" and not args.shard_dirs:
+        parser.error("merge needs at least one shard directory")
+    if args.shard is not None and args.command != "build":
+        parser.error("--shard only applies to the build command")
+    if args.shard is not None and args.search:
+        parser.error("--search indexes the whole site and cannot be combined with --shard")
+
+    if args.command == "merge":
+        merge(args)
+        return
+
+    profile = BuildProfile() if args.report else None
+    block_cache = create_block_cache(args)
+    build(args, profile=profile, block_cache=block_cache, etags=args.command == "serve")
+    if block_cache is not None:
+        print(f"Block cache: {block_cache.hits} hits, {block_cache.misses} misses")
+    if profile is not None:
+        print(BuildProfile.summary(profile.write(args.report), args.top))
+
+    if args.command == "serve":
+        serve(args, block_cache)
+
+
+def build(
+    args: argparse.Namespace,
+    changed: set[str] = None,
+    profile: BuildProfile = None,
+    block_cache: BlockCache = None,
+    etags: bool = False,
+):
+    content = base_path("content")
+    static = base_path("static")
+    template = base_path("template.html")
+    staged = create_staged_output(args)
+    public = live_output(base_path("public")) if staged is None else staged.prepare()
+
+    static_changed = changed is None or any(is_inside(path, static) for path in changed)
+    if static_changed:
+        asset_urls = sync_static(args, public, profile)
+    elif args.fingerprint:
+        asset_urls = load_asset_urls(public)
+    else:
+        asset_urls = None
+    image_index = ImageIndex.load(base_path(".build/images.json"))
+    context = RenderContext(asset_urls, image_index.scan(static), minify=args.minify, collect_terms=args.search)
+    image_index.save()
+
+    content_changed = [path for path in changed or () if is_inside(path, content)]
+    # a changed asset can change any page's image sizes or asset urls, so the manifest decides what is stale
+    rebuild_all = changed is None or template in changed or static_changed
+    if rebuild_all or content_changed:
+        pages = generate_pages_recursive(
+            dir_path_content=content,
+            template_path=template,
+            dest_dir_path=public,
+            manifest_path=base_path(page_manifest_name(args.shard)),
+            jobs=args.jobs,
+            only=None if rebuild_all else content_changed,
+            profile=profile,
+            block_cache=block_cache,
+            pipeline_depth=args.pipeline,
+            context=context,
+            shard=args.shard,
+            search_index=SearchIndex.load(base_path(".build/search.json")) if args.search else None,
+        )
+        if args.shard is not None:
+            write_shard_manifest(public, args.shard, pages, content)
+        if block_cache is not None and block_cache.path is not None:
+            block_cache.save()
+
+    if args.site_url and args.shard is None:
+        write_site_listings(args, public, context)
 
+    if args.precompress:
+        precompress_tree(public, base_path(".build/precompress.json"))
+    # the etag manifest is only for the dev server, so deployable builds leave none behind
+    if etags:
+        write_etags(public)
+    else:
+        remove_etags(public)
+    if staged is not None:
+        staged.commit()
 
-def main():
-    copy_contents(base_path("static"), base_path("public"))
 
-    generate_pages_recursive(
-        dir_path_content=base_path("content"),
-        template_path=base_path("template.html"),
-        dest_dir_path=base_path("public")
+def sync_static(args: argparse.Namespace, public: str, profile: BuildProfile = None) -> None | dict[str, str]:
+    static = base_path("static")
+    started = time.perf_counter()
+    stats = copy_contents(
+        static,
+        public,
+        sync=True,
+        checksum=args.checksum,
+        link=args.link,
+        manifest_path=base_path(".build/static.json"),
     )
+    if profile is not None:
+        profile.add_copy(stats, time.perf_counter() - started)
+    if args.fingerprint:
+        return fingerprint_assets(static, public, base_path(".build/assets.json"))
+    return None
+
+
+def merge(args: argparse.Namespace):
+    content = base_path("content")
+    staged = create_staged_output(args)
+    public = live_output(base_path("public")) if staged is None else staged.prepare()
+    asset_urls = sync_static(args, public)
+    expected_keys = {shard_key(from_path, content) for from_path, _ in find_pages(content, public)}
+    merge_shards(args.shard_dirs, expected_keys, public)
+    if args.site_url:
+        write_site_listings(args, public, RenderContext(asset_urls, minify=args.minify))
+    if args.precompress:
+        precompress_tree(public, base_path(".build/precompress.json"))
+    remove_etags(public)
+    if staged is not None:
+        staged.commit()
+
+
+def page_manifest_name(shard: tuple[int, int] = None) -> str:
+    # each shard keeps its own manifest, so shards built side by side in one checkout do not overwrite each other's
+    if shard is None:
+        return ".build/manifest.json"
+    return f".build/manifest-{shard[0]}-of-{shard[1]}.json"
+
+
+def create_staged_output(args: argparse.Namespace) -> None | StagedOutput:
+    if not args.stage:
+        return None
+    return StagedOutput(base_path("public"), base_path(".build/releases"))
+
+
+def write_site_listings(args: argparse.Namespace, public: str, context: RenderContext = None) -> None:
+    metadata_index = MetadataIndex.load(base_path(".build/metadata.json"))
+    metadata_index.scan(base_path("content"))
+    write_listings(metadata_index, args.site_url, base_path("template.html"), public, context)
+    metadata_index.save()
+
+
+def create_block_cache(args: argparse.Namespace) -> None | BlockCache:
+    if args.block_cache <= 0:
+        return None
+    if args.persist_block_cache:
+        return BlockCache.load(base_path(".build/blocks.json"), args.block_cache)
+    return BlockCache(args.block_cache)
+
+
+def serve(args: argparse.Namespace, block_cache: BlockCache = None):
+    server = create_server(base_path("public"), args.port, quiet=args.quiet)
+    try:
+        if not args.watch:
+            server.serve_forever()
+            return
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        watcher = PollingWatcher([base_path("content"), base_path("static"), base_path("template.html")])
+        for changed in watcher.watch():
+            started = time.perf_counter()
+            try:
+                build(args, changed, block_cache=block_cache, etags=True)
+            except Exception as e:
+                print(f"Rebuild failed: {e}")
+                continue
+            print(f"Rebuilt {len(changed)} changed file(s) in {(time.perf_counter() - started) * 1000:.1f} ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.watch:
+            server.shutdown()
+        server.server_close()
+
+
+def is_inside(path: str, directory: str) -> bool:
+    return path.startswith(directory + os.sep)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,51 @@
+import mmap
+import os
+from typing import Iterator
+
+
+class MappedSource:
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._file = None
+        self._map = None
+
+    def __enter__(self) -> 'MappedSource':
+        self._file = open(self.path, "rb")
+        # empty files cannot be mapped
+        if os.fstat(self._file.fileno()).st_size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def lines(self) -> Iterator[str]:
+        # the same lines a text mode file yields: \r\n and \r become \n, and only the line being
+        # yielded is copied out of the map and decoded
+        data = self._map
+        if data is None:
+            return
+        size = len(data)
+        position = 0
+        line_feed = data.find(b"\n")
+        carriage_return = data.find(b"\r")
+        while position < size:
+            if line_feed != -1 and line_feed < position:
+                line_feed = data.find(b"\n", position)
+            if carriage_return != -1 and carriage_return < position:
+                carriage_return = data.find(b"\r", position)
+            if carriage_return == -1 or line_feed != -1 and line_feed < carriage_return:
+                if line_feed == -1:
+                    yield data[position:].decode(self.encoding)
+                    return
+                yield data[position:line_feed + 1].decode(self.encoding)
+                position = line_feed + 1
+                continue
+            yield data[position:carriage_return].decode(self.encoding) + "\n"
+            position = carriage_return + 1
+            if data[position:position + 1] == b"\n":
+                position += 1
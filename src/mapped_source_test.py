@@ -0,0 +1,46 @@
+import contextlib
+import io
+import os
+import unittest
+
+from generate_page import generate_page
+from mapped_source import MappedSource
+from test_helpers import TempDirTestCase, write_file
+
+
+class MappedSourceTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = os.path.join(self.tmp.name, "index.md")
+
+    def test_lines_match_text_mode_reading(self):
+        for data in (b"", b"elf", b"elf\n", b"elf\r\nring\rmap\n\nend", b"\r\r\n\n", "mithril é\r\nü\n".encode(), b"x\r"):
+            with self.subTest(data=data):
+                write_file(self.path, data)
+                with open(self.path) as file:
+                    expected = list(file)
+
+                with MappedSource(self.path) as source:
+                    self.assertEqual(expected, list(source.lines()))
+
+    def test_lines_can_be_read_twice(self):
+        write_file(self.path, b"# Title\n\nText\n")
+
+        with MappedSource(self.path) as source:
+            self.assertEqual("# Title\n", next(source.lines()))
+            self.assertEqual(["# Title\n", "\n", "Text\n"], list(source.lines()))
+
+    def test_generate_page_leaves_no_partial_output(self):
+        template = os.path.join(self.tmp.name, "template.html")
+        dest = os.path.join(self.tmp.name, "public", "index.html")
+        write_file(template, "{{ Title }}{{ Content }}")
+        write_file(self.path, b"No title here\n")
+
+        with contextlib.redirect_stdout(io.StringIO()), self.assertRaises(ValueError):
+            generate_page(self.path, template, dest)
+
+        self.assertEqual([], os.listdir(os.path.dirname(dest)))
+
+
+if __name__ == '__main__':
+    unittest.main()
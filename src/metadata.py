@@ -0,0 +1,158 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Iterable, Iterator
+
+from extract_title import extract_title
+from mapped_source import MappedSource
+
+INDEX_FORMAT = 1
+FRONT_MATTER_DELIMITER = "---"
+FRONT_MATTER_LINE_PATTERN = re.compile(r"^([A-Za-z_][\w-]*):\s*(.*?)\s*$")
+MAX_FRONT_MATTER_LINES = 64
+# front matter and the title heading are expected near the top, so only this much of a file is read
+SCAN_BYTES = 4096
+
+
+def parse_front_matter(lines: Iterable[str]) -> tuple[None | dict[str, str], list[str]]:
+    # returns the fields and the lines that were read; the fields are None if the lines are not front matter
+    lines = iter(lines)
+    consumed = []
+    for line in lines:
+        consumed.append(line)
+        if len(consumed) == 1:
+            if line.rstrip("\n") != FRONT_MATTER_DELIMITER:
+                return None, consumed
+            continue
+        stripped = line.rstrip("\n")
+        if stripped == FRONT_MATTER_DELIMITER:
+            fields = {}
+            for field_line in consumed[1:-1]:
+                match = FRONT_MATTER_LINE_PATTERN.match(field_line)
+                if match:
+                    fields[match.group(1)] = match.group(2).strip("\"'")
+            return fields, consumed
+        if stripped.strip() and not FRONT_MATTER_LINE_PATTERN.match(stripped) or len(consumed) > MAX_FRONT_MATTER_LINES:
+            return None, consumed
+    return None, consumed
+
+
+def strip_front_matter(lines: Iterable[str]) -> Iterator[str]:
+    lines = iter(lines)
+    fields, consumed = parse_front_matter(lines)
+    if fields is None:
+        yield from consumed
+    yield from lines
+
+
+def page_title(markdown: str | Iterable[str]) -> str:
+    # a title in the front matter wins over the first heading
+    lines = iter(markdown.splitlines() if isinstance(markdown, str) else markdown)
+    fields, consumed = parse_front_matter(lines)
+    if fields is not None and fields.get("title"):
+        return fields["title"]
+    return extract_title(lines if fields is not None else chain(consumed, lines))
+
+
+def scan_metadata(path: str) -> dict[str, str]:
+    with open(path, "rb") as file:
+        prefix = file.read(SCAN_BYTES)
+        truncated = bool(file.read(1))
+    text = prefix.decode("utf-8", errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+    lines = text.splitlines(keepends=True)
+    if truncated and lines:
+        lines.pop()  # may end in the middle of a line or character
+    fields, _ = parse_front_matter(lines)
+    metadata = dict(fields or {})
+    try:
+        metadata["title"] = page_title(lines)
+    except ValueError:
+        # the heading is further down than the prefix, so fall back to reading the whole file
+        with MappedSource(path) as source:
+            metadata["title"] = page_title(source.lines())
+    return metadata
+
+
+def iso_timestamp(value: None | str, mtime_ns: int) -> str:
+    if value and re.fullmatch(r"\d{4}-\d{2}-\d{2}", value):
+        return f"{value}T00:00:00Z"
+    if value:
+        return value
+    return datetime.fromtimestamp(mtime_ns / 1e9, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class MetadataIndex:
+    def __init__(self, path: str = None, entries: dict[str, dict] = None, listings_digest: str = None):
+        self.path = path
+        self.entries = entries or {}
+        self.listings_digest = listings_digest
+
+    @classmethod
+    def load(cls, path: str) -> 'MetadataIndex':
+        if not os.path.isfile(path):
+            return cls(path)
+        with open(path) as file:
+            data = json.load(file)
+        if data.get("format") != INDEX_FORMAT:
+            return cls(path)
+        return cls(path, data["entries"], data.get("listings_digest"))
+
+    def save(self) -> None:
+        if self.path is None:
+            raise ValueError("MetadataIndex has no path to save to")
+        dirpath = os.path.dirname(self.path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            data = {"format": INDEX_FORMAT, "entries": self.entries, "listings_digest": self.listings_digest}
+            json.dump(data, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def scan(self, dir_path_content: str) -> bool:
+        entries = {}
+        changed = False
+        directories = [dir_path_content]
+        while directories:
+            with os.scandir(directories.pop()) as dir_entries:
+                for entry in dir_entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directories.append(entry.path)
+                        continue
+                    if not entry.name.endswith(".md"):
+                        continue
+                    key = os.path.relpath(entry.path, dir_path_content).replace(os.sep, "/")
+                    stat = entry.stat()
+                    cached = self.entries.get(key)
+                    if cached is not None and (cached["mtime_ns"], cached["size"]) == (stat.st_mtime_ns, stat.st_size):
+                        entries[key] = cached
+                        continue
+                    metadata = scan_metadata(entry.path)
+                    metadata["updated"] = iso_timestamp(metadata.get("date"), stat.st_mtime_ns)
+                    if key == "index.md" or key.endswith("/index.md"):
+                        metadata["url"] = "/" + key[:-len("index.md")]
+                    else:
+                        metadata["url"] = "/" + key[:-2] + "html"
+                    entries[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "metadata": metadata}
+                    changed = changed or cached is None or cached["metadata"] != metadata
+        changed = changed or entries.keys() != self.entries.keys()
+        self.entries = entries
+        return changed
+
+    def get(self, key: str) -> None | dict[str, str]:
+        entry = self.entries.get(key)
+        return None if entry is None else entry["metadata"]
+
+    def pages(self, section: str = None, include_index: bool = True) -> list[dict[str, str]]:
+        prefix = "" if section is None else section.strip("/") + "/"
+        pages = [
+            {"key": key, **entry["metadata"]}
+            for key, entry in self.entries.items()
+            if key.startswith(prefix) and (include_index or key != prefix + "index.md")
+        ]
+        # newest first, then by url so the order is stable
+        pages.sort(key=lambda page: page["url"])
+        pages.sort(key=lambda page: page["updated"], reverse=True)
+        return pages
@@ -0,0 +1,127 @@
+import contextlib
+import io
+import os
+import unittest
+from unittest import mock
+
+import metadata
+from listings import write_listings
+from generate_page import generate_page
+from metadata import MetadataIndex, page_title, parse_front_matter, scan_metadata
+from test_helpers import TempDirTestCase, read_file, write_file
+from utils import markdown_to_html_node
+
+TEMPLATE = "<html><head><title>{{ Title }}</title></head><body>{{ Content }}</body></html>"
+
+
+class MetadataTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, TEMPLATE)
+
+    def write(self, relpath, text):
+        return write_file(os.path.join(self.content, relpath), text)
+
+    def test_it_parses_front_matter(self):
+        lines = ["---\n", "title: The Ring\n", 'date: "2024-05-01"\n', "---\n", "# Heading\n"]
+        self.assertEqual(({"title": "The Ring", "date": "2024-05-01"}, lines[:4]), parse_front_matter(lines))
+        self.assertIsNone(parse_front_matter(["---\n", "not a field\n", "---\n"])[0])
+        self.assertIsNone(parse_front_matter(["# Heading\n"])[0])
+
+    def test_front_matter_is_not_rendered(self):
+        html = markdown_to_html_node("---\ndate: 2024-05-01\n---\n# Heading\n\nText").to_html()
+        self.assertEqual("<div><h1>Heading</h1><p>Text</p></div>", html)
+
+    def test_front_matter_title_wins_over_the_heading(self):
+        self.assertEqual("Front", page_title("---\ntitle: Front\n---\n# Heading"))
+        self.assertEqual("Heading", page_title("---\ntitle:\n---\n# Heading"))
+        self.assertEqual("Heading", page_title(["---\n", "# Heading\n"]))
+        with self.assertRaises(ValueError):
+            page_title("---\ndate: 2024-05-01\n---\nNo heading")
+
+    def test_pages_and_listings_use_the_same_title(self):
+        path = self.write("about.md", "---\ntitle: About Us\n---\n# About\n")
+        dest_path = os.path.join(self.public, "about.html")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(path, self.template, dest_path)
+        self.assertIn("<title>About Us</title>", read_file(dest_path))
+        self.assertEqual("About Us", scan_metadata(path)["title"])
+
+        path = self.write("only.md", "---\ntitle: Only Front Matter\n---\nNo heading here\n")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_page(path, self.template, os.path.join(self.public, "only.html"))
+        self.assertEqual("Only Front Matter", scan_metadata(path)["title"])
+
+    def test_it_reads_only_a_prefix_of_the_page(self):
+        path = self.write("blog/ring/index.md", "---\ndate: 2024-05-01\n---\n\n# The Ring\n\n" + "text " * 10000)
+        with mock.patch("metadata.MappedSource") as mapped_source:
+            self.assertEqual({"date": "2024-05-01", "title": "The Ring"}, scan_metadata(path))
+        mapped_source.assert_not_called()
+
+        path = self.write("late.md", "text\n" * 2000 + "# Late Title\n")
+        self.assertEqual({"title": "Late Title"}, scan_metadata(path))
+
+    def test_index_reuses_unchanged_entries(self):
+        self.write("index.md", "# Home")
+        self.write("blog/ring/index.md", "---\ndate: 2024-05-01\n---\n# The Ring")
+        index = MetadataIndex(os.path.join(self.tmp.name, "metadata.json"))
+        self.assertTrue(index.scan(self.content))
+        index.save()
+
+        index = MetadataIndex.load(index.path)
+        with mock.patch("metadata.scan_metadata", wraps=metadata.scan_metadata) as scan:
+            self.assertFalse(index.scan(self.content))
+        scan.assert_not_called()
+        self.assertEqual("/blog/ring/", index.get("blog/ring/index.md")["url"])
+        self.assertEqual("2024-05-01T00:00:00Z", index.get("blog/ring/index.md")["updated"])
+
+    def test_pages_are_newest_first(self):
+        self.write("blog/old.md", "---\ndate: 2023-01-01\n---\n# Old")
+        self.write("blog/new/index.md", "---\ndate: 2024-01-01\n---\n# New")
+        self.write("about.md", "---\ndate: 2025-01-01\n---\n# About")
+        index = MetadataIndex()
+        index.scan(self.content)
+        self.assertEqual(["/blog/new/", "/blog/old.html"], [page["url"] for page in index.pages("blog")])
+        self.assertEqual(3, len(index.pages()))
+
+    def test_only_index_pages_get_directory_urls(self):
+        self.write("index.md", "# Home")
+        self.write("blog/index.md", "# Blog")
+        self.write("blog/myindex.md", "# My Index")
+        index = MetadataIndex()
+        index.scan(self.content)
+        self.assertEqual("/", index.get("index.md")["url"])
+        self.assertEqual("/blog/", index.get("blog/index.md")["url"])
+        self.assertEqual("/blog/myindex.html", index.get("blog/myindex.md")["url"])
+
+    def write_listings(self, index):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return write_listings(index, "https://example.com/", self.template, self.public)
+
+    def test_listings_are_written_only_when_metadata_changes(self):
+        self.write("index.md", "# Home")
+        post = self.write("blog/ring/index.md", "---\ndate: 2024-05-01\ndescription: One & only\n---\n# The Ring")
+        index = MetadataIndex()
+        index.scan(self.content)
+        self.assertTrue(self.write_listings(index))
+        feed = read_file(os.path.join(self.public, "blog", "feed.xml"))
+        self.assertIn("<id>https://example.com/blog/ring/</id>", feed)
+        self.assertIn("<summary>One &amp; only</summary>", feed)
+        self.assertIn("<loc>https://example.com/</loc>", read_file(os.path.join(self.public, "sitemap.xml")))
+        self.assertIn('<li><a href="/blog/ring/">The Ring</a></li>', read_file(os.path.join(self.public, "blog", "index.html")))
+
+        with open(post, "a") as file:
+            file.write("\n\nA new paragraph.")
+        index.scan(self.content)
+        self.assertFalse(self.write_listings(index))
+
+        self.write("blog/ring/index.md", "---\ndate: 2024-05-02\n---\n# The Ring")
+        index.scan(self.content)
+        self.assertTrue(self.write_listings(index))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+import re
+from html.parser import HTMLParser
+from typing import Iterator
+
+from html_node import HTMLNode
+from template import Template
+
+MINIFY_MODES = ("fast", "safe")
+VOID_TAGS = frozenset(("area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"))
+# whitespace next to these never renders, so it can go
+BLOCK_TAGS = frozenset((
+    "!doctype", "html", "head", "body", "title", "meta", "link", "script", "style", "base", "noscript",
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "dd", "dt", "fieldset", "figcaption",
+    "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr", "li", "main", "nav",
+    "ol", "p", "pre", "section", "table", "tbody", "thead", "tfoot", "tr", "td", "th", "ul",
+))
+# a </p> may be left out when the next sibling starts with one of these
+P_CLOSING_TAGS = frozenset((
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figcaption", "figure",
+    "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr", "main", "menu", "nav", "ol",
+    "p", "pre", "section", "table", "ul",
+))
+P_END_TAG_REQUIRED_PARENTS = frozenset(("a", "audio", "del", "ins", "map", "noscript", "video"))
+# a start tag of one of these closes an open <p>, as it does in the browser's parser
+P_IMPLYING_TAGS = P_CLOSING_TAGS | frozenset(("dd", "dt", "li"))
+# an implied end tag is never looked for past one of these
+SCOPE_TAGS = frozenset(("applet", "button", "caption", "html", "marquee", "object", "table", "td", "template", "th"))
+LI_SCOPE_TAGS = SCOPE_TAGS | BLOCK_TAGS - frozenset(("address", "div", "p", "li"))
+PRESERVED_TAGS = frozenset(("pre", "textarea", "script", "style"))
+
+PRESERVED_PATTERN = re.compile(r"(<(pre|textarea|script|style)\b.*?</\2\s*>|<!--.*?-->)", re.DOTALL | re.IGNORECASE)
+TAG_PATTERN = re.compile(r"<([A-Za-z][A-Za-z0-9]*)([^<>]*?)\s*(/?)>")
+ATTRIBUTE_PATTERN = re.compile(r'(\s[^\s"\'>/=]+)="([^"]*)"')
+UNQUOTED_VALUE_PATTERN = re.compile(r"[A-Za-z0-9_.:/#?&;,+%~-]*[A-Za-z0-9_.:#?&;,+%~-]")
+OMITTED_HEAD_END_PATTERN = re.compile(r"</head>(?=<body\b)", re.IGNORECASE)
+OMITTED_DOCUMENT_END_PATTERN = re.compile(r"(?:\s*</(?:body|html)\s*>)+\s*$", re.IGNORECASE)
+WHITESPACE_BETWEEN_TAGS_PATTERN = re.compile(r"(<(/?)([A-Za-z!][A-Za-z0-9]*)[^<>]*>)\s+(?=<(/?)([A-Za-z!][A-Za-z0-9]*))")
+
+
+def minify_node(node: HTMLNode) -> str:
+    return "".join(iter_minified_html(node))
+
+
+def iter_minified_html(root: HTMLNode) -> Iterator[str]:
+    # the root is a block-level fragment, so it is treated as followed by another block
+    stack = [([root], 0, None)]
+    while stack:
+        siblings, index, parent = stack[-1]
+        if index == len(siblings):
+            stack.pop()
+            if parent is not None and not can_omit_end_tag(parent, *next_in(stack)):
+                yield f"</{parent.tag}>"
+            continue
+        node = siblings[index]
+        stack[-1] = (siblings, index + 1, parent)
+        if node.children:
+            yield f"<{node.tag}{minify_props(node.props)}>"
+            stack.append((node.children, 0, node))
+        elif node.tag is None:
+            yield node.childless_html()
+        else:
+            yield f"<{node.tag}{minify_props(node.props)}>"
+            if node.value:
+                yield node.value
+            if not can_omit_end_tag(node, *next_in(stack)):
+                yield f"</{node.tag}>"
+
+
+def next_in(stack: list[tuple[list[HTMLNode], int, HTMLNode]]) -> tuple[None | HTMLNode, None | str]:
+    if not stack:
+        return None, None
+    siblings, index, parent = stack[-1]
+    return siblings[index] if index < len(siblings) else None, None if parent is None else parent.tag
+
+
+def can_omit_end_tag(node: HTMLNode, next_sibling: None | HTMLNode, parent_tag: None | str) -> bool:
+    if node.tag in VOID_TAGS:
+        return node.children is None and not node.value
+    if node.tag == "li":
+        return next_sibling is None or next_sibling.tag == "li"
+    if node.tag == "p":
+        if next_sibling is None:
+            return parent_tag not in P_END_TAG_REQUIRED_PARENTS
+        return next_sibling.tag in P_CLOSING_TAGS
+    return False
+
+
+def minify_props(props: None | dict[str, str]) -> str:
+    if not props:
+        return ""
+    return "".join(minify_attribute(f" {name}", value) for name, value in props.items())
+
+
+def minify_attribute(name: str, value: str) -> str:
+    if not value:
+        return name
+    if UNQUOTED_VALUE_PATTERN.fullmatch(value):
+        return f"{name}={value}"
+    return f"{name}=\"{value}\""
+
+
+def minify_markup(html: str) -> str:
+    parts = PRESERVED_PATTERN.split(html)
+    # split yields the surrounding text, the preserved element and its tag name in turn
+    for i in range(0, len(parts), 3):
+        parts[i] = minify_markup_segment(parts[i])
+        if i + 2 < len(parts):
+            parts[i + 2] = ""
+    return "".join(parts)
+
+
+def minify_markup_segment(html: str) -> str:
+    html = WHITESPACE_BETWEEN_TAGS_PATTERN.sub(_drop_block_whitespace, html)
+    html = OMITTED_HEAD_END_PATTERN.sub("", html)
+    return TAG_PATTERN.sub(_minify_tag, html)
+
+
+def _drop_block_whitespace(match: re.Match) -> str:
+    if match.group(3).lower() in BLOCK_TAGS or match.group(5).lower() in BLOCK_TAGS:
+        return match.group(1)
+    return match.group(0)
+
+
+def _minify_tag(match: re.Match) -> str:
+    tag, attributes, self_closing = match.groups()
+    if self_closing and tag.lower() not in VOID_TAGS:
+        return match.group(0)
+    attributes = ATTRIBUTE_PATTERN.sub(lambda attribute: minify_attribute(*attribute.groups()), attributes)
+    return f"<{tag}{attributes}>"
+
+
+def minify_template(template: Template) -> Template:
+    parts = [minify_markup(template.literals[0])]
+    for name, literal in zip(template.slot_names, template.literals[1:]):
+        parts.append(f"{{{{ {name} }}}}")
+        parts.append(minify_markup(literal))
+    parts[-1] = OMITTED_DOCUMENT_END_PATTERN.sub("", parts[-1])
+    return Template("".join(parts))
+
+
+def is_equivalent(original: str, minified: str) -> bool:
+    return normalized_events(original) == normalized_events(minified)
+
+
+class _EventRecorder(HTMLParser):
+    # records every element's end where the browser would put it, written out or implied
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.events = []
+        self.open_elements = []
+        self.preserved = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in P_IMPLYING_TAGS:
+            self.close_in_scope("p", SCOPE_TAGS)
+        if tag == "li":
+            self.close_in_scope("li", LI_SCOPE_TAGS)
+        elif tag == "body":
+            self.close_in_scope("head", SCOPE_TAGS)
+        self.events.append(("start", tag, tuple(sorted((name, value or "") for name, value in attrs))))
+        if tag in VOID_TAGS:
+            return
+        self.open_elements.append(tag)
+        if tag in PRESERVED_TAGS:
+            self.preserved += 1
+
+    def handle_startendtag(self, tag, attrs):
+        # a self-closing slash is ignored on elements that are not void
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag == "p" and not self.close_in_scope("p", SCOPE_TAGS):
+            # a stray </p> makes an empty paragraph
+            self.events.extend((("start", "p", ()), ("end", "p")))
+            return
+        self.close_in_scope(tag, ())
+
+    def close_in_scope(self, tag: str, boundaries: frozenset[str]) -> bool:
+        for i in range(len(self.open_elements) - 1, -1, -1):
+            if self.open_elements[i] == tag:
+                while len(self.open_elements) > i:
+                    self.end_element(self.open_elements.pop())
+                return True
+            if self.open_elements[i] in boundaries:
+                return False
+        return False
+
+    def end_element(self, tag: str) -> None:
+        if tag in PRESERVED_TAGS:
+            self.preserved = max(self.preserved - 1, 0)
+        self.events.append(("end", tag))
+
+    def close(self):
+        super().close()
+        while self.open_elements:
+            self.end_element(self.open_elements.pop())
+
+    def handle_data(self, data):
+        kind = "preserved" if self.preserved else "text"
+        if self.events and self.events[-1][0] == kind:
+            data = self.events.pop()[1] + data
+        self.events.append((kind, data))
+
+    def handle_comment(self, data):
+        self.events.append(("comment", data))
+
+    def handle_decl(self, decl):
+        self.events.append(("start", "!" + decl.split()[0].lower(), (decl.lower(),)))
+
+
+def normalized_events(html: str) -> list[tuple]:
+    recorder = _EventRecorder()
+    recorder.feed(html)
+    recorder.close()
+    events = recorder.events
+    normalized = []
+    for i, event in enumerate(events):
+        if event[0] != "text":
+            normalized.append(event)
+            continue
+        text = re.sub(r"\s+", " ", event[1])
+        if i == 0 or is_block_event(events[i - 1]):
+            text = text.lstrip()
+        if i + 1 == len(events) or is_block_event(events[i + 1]):
+            text = text.rstrip()
+        if text:
+            normalized.append(("text", text))
+    return normalized
+
+
+def is_block_event(event: tuple) -> bool:
+    return event[0] in ("start", "end") and event[1] in BLOCK_TAGS
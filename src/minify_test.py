@@ -0,0 +1,84 @@
+import contextlib
+import io
+import unittest
+
+from block_cache import BlockCache
+from html_node import LeafNode, ParentNode
+from minify import is_equivalent, minify_markup, minify_node, minify_template
+from render_context import RenderContext
+from template import Template
+from utils import markdown_to_html_node
+
+
+class MinifyTest(unittest.TestCase):
+    def test_template_whitespace_quotes_and_end_tags(self):
+        template = Template(
+            '<!doctype html>\n<html>\n<head>\n    <meta charset="utf-8" />\n'
+            '    <link href="/index.css" rel="stylesheet" />\n</head>\n\n'
+            '<body>\n<article>{{ Content }}</article>\n</body>\n</html>\n'
+        )
+
+        minified = minify_template(template)
+
+        self.assertEqual(
+            '<!doctype html><html><head><meta charset=utf-8><link href=/index.css rel=stylesheet>'
+            '<body><article>{{ Content }}</article>',
+            minified.source,
+        )
+        self.assertTrue(is_equivalent(template.source, minified.source))
+
+    def test_inline_whitespace_and_preformatted_text_are_kept(self):
+        html = '<div>\n  <p><b>elf</b> <i>ring</i></p>\n</div><pre>\n  x  =  1\n</pre><!-- keep  me -->'
+
+        self.assertEqual('<div><p><b>elf</b> <i>ring</i></p></div><pre>\n  x  =  1\n</pre><!-- keep  me -->', minify_markup(html))
+
+    def test_nodes_drop_optional_end_tags(self):
+        node = ParentNode("ul", [
+            ParentNode("li", [LeafNode("a", "Tom", {"href": "/blog/tom"})]),
+            LeafNode("li", "ring", {"class": "two words"}),
+        ])
+
+        self.assertEqual('<ul><li><a href=/blog/tom>Tom</a><li class="two words">ring</ul>', minify_node(node))
+
+    def test_paragraph_end_tag_is_kept_before_inline_content(self):
+        node = ParentNode("div", [LeafNode("p", "elf"), LeafNode(None, "text"), LeafNode("p", "ring")])
+
+        self.assertEqual("<div><p>elf</p>text<p>ring</div>", minify_node(node))
+
+    def test_code_blocks_are_untouched(self):
+        markdown = "```\nif  x:\n    return  '<a  href=\"y\">'\n```"
+        node = markdown_to_html_node(markdown).children[0]
+
+        self.assertEqual("<pre><code>if  x:\n    return  '<a  href=\"y\">'\n</code></pre>", minify_node(node))
+
+    def test_equivalence_rejects_changed_inline_whitespace(self):
+        self.assertTrue(is_equivalent("<div>\n  <p>elf</p>\n</div>", "<div><p>elf</div>"))
+        self.assertFalse(is_equivalent("<p><b>elf</b> <i>ring</i></p>", "<p><b>elf</b><i>ring</i></p>"))
+        self.assertFalse(is_equivalent("<pre> x</pre>", "<pre>x</pre>"))
+
+    def test_equivalence_resolves_omitted_end_tags(self):
+        self.assertFalse(is_equivalent("<div><p>a</p>b</div>", "<div><p>ab</div>"))
+        self.assertFalse(is_equivalent("<ul><li>a</li>b</ul>", "<ul><li>ab</ul>"))
+        self.assertFalse(is_equivalent("<ul><li><p>a</p>b</li></ul>", "<ul><li><p>a<li>b</ul>"))
+        self.assertTrue(is_equivalent("<div><p>a</p><ul><li>b</li><li>c</li></ul></div>", "<div><p>a<ul><li>b<li>c</ul></div>"))
+
+    def test_safe_mode_keeps_blocks_that_do_not_match(self):
+        context = RenderContext(minify="safe")
+        # a bare < inside a tag confuses the parser, so the unquoted form does not round trip
+        node = LeafNode("a", "elf", {"title": "a<b"})
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual('<a title="a<b">elf</a>', context.minify_block(node)[0])
+
+    def test_minified_pages_match_with_and_without_block_cache(self):
+        markdown = "# Ring\n\npara _one_\n\n- a\n- b\n\n1. c\n2. d\n\n> quote"
+        context = RenderContext(minify="fast")
+
+        expected = markdown_to_html_node(markdown, context=context).to_html()
+
+        self.assertEqual("<div><h1>Ring</h1><p>para <i>one</i><ul><li>a<li>b</ul><ol><li>c<li>d</ol><blockquote>quote</blockquote></div>", expected)
+        self.assertEqual(expected, markdown_to_html_node(markdown, BlockCache(), context).to_html())
+
+
+if __name__ == '__main__':
+    unittest.main()
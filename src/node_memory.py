@@ -0,0 +1,38 @@
+import argparse
+import tracemalloc
+
+from base_path import base_path
+from generate_pages_recursive import find_pages
+from instrumentation import count_nodes
+from utils import markdown_to_html_node
+
+
+def read_corpus(content_dir: str) -> list[str]:
+    sources = []
+    for from_path, _ in sorted(find_pages(content_dir, content_dir)):
+        with open(from_path) as file:
+            sources.append(file.read())
+    return sources
+
+
+def measure(sources: list[str], copies: int) -> tuple[int, int]:
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    trees = [markdown_to_html_node(source) for _ in range(copies) for source in sources]
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return allocated, sum(map(count_nodes, trees))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory held by HTMLNode trees")
+    parser.add_argument("--content", default=base_path("content"), help="directory with markdown sources")
+    parser.add_argument("--copies", type=int, default=200, help="how many times to parse the corpus")
+    args = parser.parse_args()
+
+    allocated, nodes = measure(read_corpus(args.content), args.copies)
+    print(f"{nodes} nodes, {allocated} bytes, {allocated / nodes:.1f} bytes per node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+from typing import Iterator
+
+from block_cache import BlockCache
+from generate_page import render_page, write_page
+from instrumentation import BuildProfile, PageProfile
+from metadata import page_title
+from render_context import RenderContext
+from template import load_template
+
+_DONE = object()
+
+
+def build_pages_pipelined(
+    pages: list[tuple[str, str]],
+    template_path: str,
+    queue_depth: int = 8,
+    profile: BuildProfile = None,
+    block_cache: BlockCache = None,
+    context: RenderContext = None,
+) -> Iterator[tuple[tuple[str, str], None | dict]]:
+    if queue_depth < 1:
+        raise ValueError("queue_depth must be at least 1")
+    template = load_template(template_path)
+    parse_queue = queue.Queue(maxsize=queue_depth)
+    write_queue = queue.Queue(maxsize=queue_depth)
+    written = queue.Queue()
+    stopped = threading.Event()
+
+    def read():
+        for from_path, dest_path in pages:
+            if stopped.is_set():
+                break
+            page_profile = None if profile is None else PageProfile(from_path)
+            started = time.perf_counter()
+            try:
+                with open(from_path) as file:
+                    markdown = file.read()
+            except Exception as e:
+                markdown = e
+            if page_profile is not None:
+                page_profile.add("read", time.perf_counter() - started)
+            parse_queue.put(((from_path, dest_path), markdown, page_profile))
+        parse_queue.put(_DONE)
+
+    def write():
+        while (item := write_queue.get()) is not _DONE:
+            page, html_document, page_profile, search_entry = item
+            started = time.perf_counter()
+            try:
+                write_page(page[1], html_document)
+            except Exception as e:
+                written.put((page, e, None, None))
+                continue
+            if page_profile is not None:
+                page_profile.add("write", time.perf_counter() - started)
+                page_profile.output_bytes = len(html_document.encode())
+            written.put((page, None, page_profile, search_entry))
+
+    reader = threading.Thread(target=read, name="page-reader", daemon=True)
+    writer = threading.Thread(target=write, name="page-writer", daemon=True)
+    reader.start()
+    writer.start()
+    errors = []
+    try:
+        while (item := parse_queue.get()) is not _DONE:
+            page, markdown, page_profile = item
+            if isinstance(markdown, Exception):
+                errors.append(markdown)
+                continue
+            print(f"Generating page from {page[0]} to {page[1]} using {template_path}")
+            try:
+                html_document = render_page(markdown, template, block_cache, context, page_profile)
+                search_entry = None if context is None else context.search_entry(page_title(markdown))
+            except Exception as e:
+                errors.append(e)
+                continue
+            write_queue.put((page, html_document, page_profile, search_entry))
+            yield from _completed(written, errors, profile)
+    finally:
+        stopped.set()
+        while reader.is_alive():
+            try:
+                parse_queue.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        write_queue.put(_DONE)
+        writer.join()
+    yield from _completed(written, errors, profile)
+    if errors:
+        raise errors[0]
+
+
+def _completed(
+    written: queue.Queue,
+    errors: list[Exception],
+    profile: BuildProfile,
+) -> Iterator[tuple[tuple[str, str], None | dict]]:
+    while True:
+        try:
+            page, error, page_profile, search_entry = written.get_nowait()
+        except queue.Empty:
+            return
+        if error is not None:
+            errors.append(error)
+            continue
+        if profile is not None:
+            profile.add_page(page_profile)
+        yield page, search_entry
@@ -0,0 +1,156 @@
+import gzip
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from file_utils import temporary_path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = frozenset((".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map"))
+MIN_SIZE = 1024
+MAX_RATIO = 0.9
+
+
+def gzip_compress(data: bytes) -> bytes:
+    # a fixed mtime keeps the output reproducible, so unchanged files produce unchanged siblings
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+def encodings() -> dict[str, Callable[[bytes], bytes]]:
+    if brotli is None:
+        return {".gz": gzip_compress}
+    return {".gz": gzip_compress, ".br": brotli_compress}
+
+
+def is_compressible(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def precompress_file(
+    path: str,
+    min_size: int = MIN_SIZE,
+    max_ratio: float = MAX_RATIO,
+    previous: dict = None,
+) -> tuple[dict[str, int], dict]:
+    # returns the stats and the record of which siblings this step owns and which encodings did not pay off
+    stats = {"compressed": 0, "unchanged": 0, "skipped": 0, "removed": 0, "bytes_saved": 0}
+    source_stat = os.stat(path)
+    record = {"size": source_stat.st_size, "mtime_ns": source_stat.st_mtime_ns, "siblings": [], "skipped": []}
+    if previous is None or [previous["size"], previous["mtime_ns"]] != [source_stat.st_size, source_stat.st_mtime_ns]:
+        previous = {"siblings": previous["siblings"] if previous else [], "skipped": []}
+    data = None
+    for suffix, compress in encodings().items():
+        sibling = path + suffix
+        if suffix in previous["skipped"]:
+            stats["skipped"] += 1
+            record["skipped"].append(suffix)
+            continue
+        try:
+            sibling_stat = os.stat(sibling)
+        except FileNotFoundError:
+            sibling_stat = None
+        # siblings carry the mtime of their source, so a matching mtime means they are current
+        if sibling_stat is not None and sibling_stat.st_mtime_ns == source_stat.st_mtime_ns:
+            stats["unchanged"] += 1
+            stats["bytes_saved"] += source_stat.st_size - sibling_stat.st_size
+            record["siblings"].append(suffix)
+            continue
+        if source_stat.st_size >= min_size:
+            if data is None:
+                with open(path, "rb") as file:
+                    data = file.read()
+            compressed = compress(data)
+            if len(compressed) <= len(data) * max_ratio:
+                tmp_path = temporary_path(sibling)
+                with open(tmp_path, "wb") as file:
+                    file.write(compressed)
+                os.utime(tmp_path, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+                os.replace(tmp_path, sibling)
+                stats["compressed"] += 1
+                stats["bytes_saved"] += len(data) - len(compressed)
+                record["siblings"].append(suffix)
+                continue
+        stats["skipped"] += 1
+        record["skipped"].append(suffix)
+        # only a sibling this step wrote is removed; anything else came from static/
+        if sibling_stat is not None and suffix in previous["siblings"]:
+            os.remove(sibling)
+            stats["removed"] += 1
+    return stats, record
+
+
+def precompress_tree(
+    root: str,
+    manifest_path: str = None,
+    jobs: int = None,
+    min_size: int = MIN_SIZE,
+    max_ratio: float = MAX_RATIO,
+) -> dict[str, int]:
+    suffixes = tuple(encodings())
+    manifest = load_manifest(manifest_path)
+    sources = []
+    directories = [root]
+    while directories:
+        with os.scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_symlink() or entry.name.startswith("."):
+                    continue  # dotfiles are build state, not served
+                if entry.is_dir():
+                    directories.append(entry.path)
+                elif entry.is_file() and is_compressible(entry.name):
+                    sources.append(entry.path)
+
+    stats = {"compressed": 0, "unchanged": 0, "skipped": 0, "removed": 0, "bytes_saved": 0}
+    keys = {path: os.path.relpath(path, root).replace(os.sep, "/") for path in sources}
+    # siblings of sources that are gone are removed, but only those this step recorded writing
+    for key in manifest.keys() - set(keys.values()):
+        for suffix in manifest.pop(key)["siblings"]:
+            sibling = os.path.join(root, key + suffix)
+            if os.path.isfile(sibling):
+                os.remove(sibling)
+                stats["removed"] += 1
+
+    def precompress(path: str) -> tuple[dict[str, int], dict]:
+        return precompress_file(path, min_size, max_ratio, manifest.get(keys[path]))
+
+    # zlib and brotli release the GIL while compressing, so threads scale across cores
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for path, (file_stats, record) in zip(sources, executor.map(precompress, sources)):
+            manifest[keys[path]] = record
+            for name, value in file_stats.items():
+                stats[name] += value
+    if manifest_path is not None:
+        save_manifest(manifest_path, manifest)
+
+    print(
+        f"Precompressed {len(sources)} files ({', '.join(s[1:] for s in suffixes)}): {stats['compressed']} compressed, "
+        f"{stats['unchanged']} unchanged, {stats['skipped']} skipped, {stats['removed']} removed, "
+        f"{stats['bytes_saved']} bytes saved"
+    )
+    return stats
+
+
+def load_manifest(path: None | str) -> dict[str, dict]:
+    if path is None or not os.path.isfile(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_manifest(path: str, manifest: dict[str, dict]) -> None:
+    dirpath = os.path.dirname(path)
+    if dirpath and not os.path.isdir(dirpath):
+        os.makedirs(dirpath)
+    tmp_path = temporary_path(path)
+    with open(tmp_path, "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
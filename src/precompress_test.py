@@ -0,0 +1,99 @@
+import contextlib
+import gzip
+import io
+import os
+import unittest
+from unittest import mock
+
+import precompress
+from precompress import precompress_file, precompress_tree
+from test_helpers import TempDirTestCase, write_file
+
+
+class PrecompressTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.tmp.name
+        self.page = os.path.join(self.root, "blog", "index.html")
+        write_file(self.page, "<p>elf hobbit ring</p>\n" * 200)
+
+    def precompress(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return precompress_tree(self.root, os.path.join(self.root, ".build", "precompress.json"), jobs=2)
+
+    def test_it_writes_gzip_siblings(self):
+        stats = self.precompress()
+
+        self.assertEqual(1, stats["compressed"])
+        with gzip.open(self.page + ".gz", "rt") as file:
+            self.assertEqual("<p>elf hobbit ring</p>\n" * 200, file.read())
+
+    def test_it_skips_up_to_date_siblings(self):
+        self.precompress()
+
+        stats = self.precompress()
+
+        self.assertEqual(0, stats["compressed"])
+        self.assertEqual(1, stats["unchanged"])
+
+    def test_it_recompresses_changed_files(self):
+        self.precompress()
+        write_file(self.page, "<p>mithril</p>\n" * 200)
+        os.utime(self.page, ns=(0, os.stat(self.page + ".gz").st_mtime_ns + 1))
+
+        self.assertEqual(1, self.precompress()["compressed"])
+        with gzip.open(self.page + ".gz", "rt") as file:
+            self.assertEqual("<p>mithril</p>\n" * 200, file.read())
+
+    def test_it_skips_small_and_incompressible_files(self):
+        small = os.path.join(self.root, "small.css")
+        noise = os.path.join(self.root, "noise.js")
+        write_file(small, "body {}")
+        write_file(noise, os.urandom(4096))
+
+        self.assertEqual(1, precompress_file(small)[0]["skipped"])
+        self.assertEqual(1, precompress_file(noise)[0]["skipped"])
+        self.assertFalse(os.path.exists(small + ".gz"))
+        self.assertFalse(os.path.exists(noise + ".gz"))
+
+    def test_it_ignores_other_file_types(self):
+        image = os.path.join(self.root, "images", "tom.png")
+        write_file(image, b"\0" * 4096)
+
+        self.precompress()
+
+        self.assertFalse(os.path.exists(image + ".gz"))
+
+    def test_it_removes_orphaned_siblings(self):
+        self.precompress()
+        os.remove(self.page)
+
+        stats = self.precompress()
+
+        self.assertEqual(1, stats["removed"])
+        self.assertFalse(os.path.exists(self.page + ".gz"))
+
+    def test_it_remembers_files_that_did_not_compress_well(self):
+        noise = os.path.join(self.root, "noise.js")
+        write_file(noise, os.urandom(4096))
+        self.precompress()
+
+        with mock.patch("precompress.gzip_compress", wraps=precompress.gzip_compress) as compress:
+            stats = self.precompress()
+
+        compress.assert_not_called()
+        self.assertEqual((1, 1), (stats["skipped"], stats["unchanged"]))
+
+    def test_it_leaves_compressed_files_it_did_not_write_alone(self):
+        archive = os.path.join(self.root, "downloads", "site.tar.gz")
+        write_file(archive, b"archive")
+        self.precompress()
+        os.remove(self.page)
+
+        self.precompress()
+
+        self.assertTrue(os.path.isfile(archive))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import re
+from collections import Counter
+
+from html_node import HTMLNode
+from minify import MINIFY_MODES, is_equivalent, minify_node, minify_template
+from search_index import html_text, tokenize
+from template import Template
+
+URL_ATTRIBUTE_PATTERN = re.compile(r'(\b(?:href|src)=")([^"]*)(")')
+# images past this many on a page are assumed to be below the first screenful
+EAGER_IMAGES = 1
+LAZY_ATTRIBUTES = {"loading": "lazy", "decoding": "async"}
+
+
+class RenderContext:
+    def __init__(
+        self,
+        asset_urls: dict[str, str] = None,
+        image_sizes: dict[str, tuple[int, int]] = None,
+        eager_images: int = EAGER_IMAGES,
+        minify: str = None,
+        collect_terms: bool = False,
+    ):
+        if minify is not None and minify not in MINIFY_MODES:
+            raise ValueError(f"Invalid minify mode: {minify}")
+        self.asset_urls = asset_urls or {}
+        self.image_sizes = image_sizes or {}
+        self.eager_images = eager_images
+        self.minify = minify
+        self.images_rendered = 0
+        # search terms of the page being rendered, None unless a search index is built
+        self.terms = Counter() if collect_terms else None
+        key = {"assets": self.asset_urls, "images": self.image_sizes, "eager": eager_images, "minify": minify}
+        self.salt = hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+        self._templates = {}
+
+    def url(self, url: str) -> str:
+        return self.asset_urls.get(url, url)
+
+    def start_page(self) -> None:
+        self.images_rendered = 0
+        if self.terms is not None:
+            self.terms = Counter()
+
+    def add_text(self, text: str) -> None:
+        self.terms.update(tokenize(text))
+
+    def add_html(self, html: str) -> None:
+        self.terms.update(tokenize(html_text(html)))
+
+    def search_entry(self, title: str) -> None | dict:
+        if self.terms is None:
+            return None
+        return {"title": title, "terms": dict(self.terms)}
+
+    def is_position_independent(self, block: str) -> bool:
+        # only an image can take one of the eager slots, so other blocks render the same anywhere on the page
+        return "![" not in block or self.images_rendered >= self.eager_images
+
+    def image_attributes(self, url: str) -> dict[str, str]:
+        attributes = {}
+        size = self.image_sizes.get(url)
+        if size is not None:
+            attributes["width"], attributes["height"] = str(size[0]), str(size[1])
+        if self.images_rendered >= self.eager_images:
+            attributes.update(LAZY_ATTRIBUTES)
+        self.images_rendered += 1
+        return attributes
+
+    def minify_block(self, node: HTMLNode, measure: bool = False) -> tuple[str, None | int]:
+        # also returns the bytes minifying saved, which needs the original HTML, so only in safe mode or when asked
+        html = minify_node(node)
+        if self.minify != "safe" and not measure:
+            return html, None
+        original = node.to_html()
+        if self.minify == "safe" and not is_equivalent(original, html):
+            print(f"Minified block does not match its original, keeping it as is: {original[:60]!r}")
+            return original, 0
+        return html, len(original.encode()) - len(html.encode())
+
+    def template(self, template: Template) -> Template:
+        return self._rewritten_template(template)[0]
+
+    def template_bytes_saved(self, template: Template) -> int:
+        return self._rewritten_template(template)[1]
+
+    def _rewritten_template(self, template: Template) -> tuple[Template, int]:
+        if not self.asset_urls and self.minify is None:
+            return template, 0
+        entry = self._templates.get(template.source)
+        if entry is None:
+            rewritten = Template(self.rewrite_urls(template.source)) if self.asset_urls else template
+            saved = 0
+            if self.minify is not None:
+                minified = minify_template(rewritten)
+                if self.minify == "fast" or is_equivalent(rewritten.source, minified.source):
+                    saved = literal_bytes(rewritten) - literal_bytes(minified)
+                    rewritten = minified
+                else:
+                    print("Minified template does not match its original, keeping it as is")
+            entry = self._templates[template.source] = (rewritten, saved)
+        return entry
+
+    def rewrite_urls(self, html: str) -> str:
+        return URL_ATTRIBUTE_PATTERN.sub(lambda match: match.group(1) + self.url(match.group(2)) + match.group(3), html)
+
+    def __getstate__(self):
+        return {
+            "asset_urls": self.asset_urls,
+            "image_sizes": self.image_sizes,
+            "eager_images": self.eager_images,
+            "minify": self.minify,
+            "collect_terms": self.terms is not None,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(
+            state["asset_urls"],
+            state["image_sizes"],
+            state["eager_images"],
+            state["minify"],
+            state["collect_terms"],
+        )
+
+    def __repr__(self):
+        return f"RenderContext({len(self.asset_urls)} asset urls, {len(self.image_sizes)} image sizes)"
+
+
+def literal_bytes(template: Template) -> int:
+    return sum(len(literal.encode()) for literal in template.literals)
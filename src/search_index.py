@@ -0,0 +1,166 @@
+import json
+import os
+import re
+import shutil
+from typing import Iterator
+
+from file_utils import replace_if_changed, temporary_path
+
+INDEX_FORMAT = 1
+INDEX_DIR_NAME = "search"
+DOCS_NAME = "docs.json"
+PREFIX_LENGTH = 2
+TERM_PATTERN = re.compile(r"\w{2,}")
+TAG_PATTERN = re.compile(r'<[^>]*?(?:\balt=(?:"([^"]*)"|([^\s">]+))[^>]*)?>')
+STOP_WORDS = frozenset("a an and are as at be by for from in is it of on or that the this to was with".split())
+
+
+def tokenize(text: str) -> Iterator[str]:
+    for match in TERM_PATTERN.finditer(text.lower()):
+        term = match.group()
+        if term not in STOP_WORDS:
+            yield term
+
+
+def html_text(html: str) -> str:
+    # image alt text is indexed too, as it is when the page is parsed
+    return TAG_PATTERN.sub(lambda match: f" {match.group(1) or match.group(2) or ''} ", html)
+
+
+def term_prefix(term: str) -> str:
+    return term[:PREFIX_LENGTH]
+
+
+def page_url(output: str) -> str:
+    url = "/" + output.replace(os.sep, "/")
+    return url[:-len("index.html")] if url.endswith("/index.html") else url
+
+
+class SearchIndex:
+    def __init__(self, path: str, pages: dict[str, dict] = None, next_id: int = 0):
+        self.path = path
+        self.pages = pages if pages is not None else {}
+        self.next_id = next_id
+        self.dirty_prefixes = set()
+        self.docs_dirty = False
+        # (page id, old terms, new terms) for every page updated since the last write
+        self.changes = []
+        self.full_rewrite = False
+
+    @classmethod
+    def load(cls, path: str) -> 'SearchIndex':
+        if os.path.isfile(path):
+            with open(path) as file:
+                data = json.load(file)
+            if data.get("format") == INDEX_FORMAT:
+                return cls(path, data["pages"], data["next_id"])
+        index = cls(path)
+        index.full_rewrite = True
+        return index
+
+    def save(self) -> None:
+        dirpath = os.path.dirname(self.path)
+        if dirpath and not os.path.isdir(dirpath):
+            os.makedirs(dirpath)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"format": INDEX_FORMAT, "next_id": self.next_id, "pages": self.pages}, file, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def update(self, key: str, url: str, title: str, terms: dict[str, int]) -> None:
+        old = self.pages.get(key)
+        if old is None:
+            page_id = self.next_id
+            self.next_id += 1
+            old_terms = {}
+        else:
+            page_id = old["id"]
+            old_terms = old["terms"]
+        if old is None or old["url"] != url or old["title"] != title:
+            self.docs_dirty = True
+        self.pages[key] = {"id": page_id, "url": url, "title": title, "terms": terms}
+        if old_terms != terms:
+            self.changes.append((page_id, old_terms, terms))
+            self.dirty_prefixes.update(term_prefix(term) for term in old_terms.keys() ^ terms.keys())
+            self.dirty_prefixes.update(term_prefix(term) for term in old_terms.keys() & terms.keys()
+                                       if old_terms[term] != terms[term])
+
+    def remove(self, key: str) -> None:
+        old = self.pages.pop(key, None)
+        if old is None:
+            return
+        self.docs_dirty = True
+        self.changes.append((old["id"], old["terms"], {}))
+        self.dirty_prefixes.update(term_prefix(term) for term in old["terms"])
+
+    def write(self, dest_dir_path: str) -> int:
+        index_dir = os.path.join(dest_dir_path, INDEX_DIR_NAME)
+        if not os.path.isfile(os.path.join(index_dir, DOCS_NAME)):
+            self.full_rewrite = True
+        if self.full_rewrite:
+            if os.path.isdir(index_dir):
+                shutil.rmtree(index_dir)
+            os.makedirs(index_dir)
+            shards = self.rebuild_shards({term_prefix(term) for page in self.pages.values() for term in page["terms"]})
+            self.docs_dirty = True
+        else:
+            shards = self.update_shards(index_dir)
+        for prefix, postings in shards.items():
+            shard_path = os.path.join(index_dir, f"{prefix}.json")
+            if not postings:
+                if os.path.isfile(shard_path):
+                    os.remove(shard_path)
+                continue
+            write_json(shard_path, {term: sorted(postings[term]) for term in sorted(postings)})
+        if self.docs_dirty:
+            pages = sorted(self.pages.values(), key=lambda page: page["id"])
+            docs = {page["id"]: [page["url"], page["title"]] for page in pages}
+            write_json(os.path.join(index_dir, DOCS_NAME), {"prefix_length": PREFIX_LENGTH, "pages": docs})
+        written = len(shards)
+        self.dirty_prefixes = set()
+        self.docs_dirty = False
+        self.changes = []
+        self.full_rewrite = False
+        return written
+
+    def update_shards(self, index_dir: str) -> dict[str, dict[str, list[list[int]]]]:
+        shards = {}
+        missing = set()
+        for prefix in self.dirty_prefixes:
+            shard_path = os.path.join(index_dir, f"{prefix}.json")
+            if os.path.isfile(shard_path):
+                with open(shard_path) as file:
+                    shards[prefix] = json.load(file)
+            else:
+                missing.add(prefix)
+        for page_id, old_terms, new_terms in self.changes:
+            for term in old_terms:
+                postings = shards.get(term_prefix(term), {}).get(term)
+                if postings is not None:
+                    postings[:] = [posting for posting in postings if posting[0] != page_id]
+                    if not postings:
+                        del shards[term_prefix(term)][term]
+            for term, count in new_terms.items():
+                if term_prefix(term) in shards:
+                    shards[term_prefix(term)].setdefault(term, []).append([page_id, count])
+        # a shard that went missing from the output is rebuilt from the full page list
+        shards.update(self.rebuild_shards(missing))
+        return shards
+
+    def rebuild_shards(self, prefixes: set[str]) -> dict[str, dict[str, list[list[int]]]]:
+        shards = {prefix: {} for prefix in prefixes}
+        if not prefixes:
+            return shards
+        for page in self.pages.values():
+            for term, count in page["terms"].items():
+                shard = shards.get(term_prefix(term))
+                if shard is not None:
+                    shard.setdefault(term, []).append([page["id"], count])
+        return shards
+
+
+def write_json(path: str, data: dict) -> None:
+    tmp_path = temporary_path(path)
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, separators=(",", ":"), ensure_ascii=False)
+    replace_if_changed(tmp_path, path)
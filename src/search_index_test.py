@@ -0,0 +1,99 @@
+import contextlib
+import io
+import json
+import os
+import unittest
+
+from generate_pages_recursive import generate_pages_recursive
+from render_context import RenderContext
+from search_index import SearchIndex, html_text, page_url, tokenize
+from test_helpers import TempDirTestCase, write_file
+
+
+class SearchIndexTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.manifest = os.path.join(self.tmp.name, ".build", "manifest.json")
+        self.index_path = os.path.join(self.tmp.name, ".build", "search.json")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the **shire**")
+        write_file(os.path.join(self.content, "blog", "ring", "index.md"), "# Ring\n\nThe _ring_ of power\n\n```\nmithril()\n```")
+
+    def shard(self, prefix):
+        with open(os.path.join(self.public, "search", f"{prefix}.json")) as file:
+            return json.load(file)
+
+    def postings_by_url(self):
+        search_dir = os.path.join(self.public, "search")
+        with open(os.path.join(search_dir, "docs.json")) as file:
+            urls = {int(page_id): url for page_id, (url, _) in json.load(file)["pages"].items()}
+        postings = {}
+        for name in os.listdir(search_dir):
+            if name != "docs.json":
+                for term, term_postings in self.shard(name[:-5]).items():
+                    postings[term] = sorted((urls[page_id], count) for page_id, count in term_postings)
+        return postings
+
+    def build(self, **kwargs):
+        search_index = SearchIndex.load(self.index_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(
+                self.content,
+                self.template,
+                self.public,
+                self.manifest,
+                context=RenderContext(collect_terms=True),
+                search_index=search_index,
+                **kwargs,
+            )
+        return search_index
+
+    def test_tokenize_and_html_text(self):
+        self.assertEqual(["elf", "ring", "mithril"], list(tokenize("The Elf, a ring: MITHRIL!")))
+        self.assertEqual(["tom", "rides"], list(tokenize(html_text('<img src=/tom.png alt="Tom"><b>rides</b>'))))
+        self.assertEqual("/blog/ring/", page_url(os.path.join("blog", "ring", "index.html")))
+        self.assertEqual("/", page_url("index.html"))
+
+    def test_build_writes_prefix_shards_and_docs(self):
+        self.build()
+
+        with open(os.path.join(self.public, "search", "docs.json")) as file:
+            docs = json.load(file)
+        ids = {url: int(page_id) for page_id, (url, _) in docs["pages"].items()}
+        self.assertEqual({"/", "/blog/ring/"}, ids.keys())
+        self.assertEqual({"ring": [[ids["/blog/ring/"], 2]]}, self.shard("ri"))
+        self.assertEqual({"mithril": [[ids["/blog/ring/"], 1]]}, self.shard("mi"))
+        self.assertEqual([[ids["/"], 1]], self.shard("sh")["shire"])
+
+    def test_one_page_rebuild_only_touches_affected_shards(self):
+        self.build()
+        untouched = os.path.join(self.public, "search", "mi.json")
+        os.utime(untouched, ns=(0, 0))
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nWelcome to the **shire** and the ring")
+
+        self.build()
+
+        self.assertEqual(0, os.stat(untouched).st_mtime_ns)
+        self.assertEqual(2, len(self.shard("ri")["ring"]))
+
+    def test_incremental_updates_match_a_full_rebuild(self):
+        self.build()
+        write_file(os.path.join(self.content, "index.md"), "# Home\n\nOnly hobbits here")
+        os.remove(os.path.join(self.content, "blog", "ring", "index.md"))
+        write_file(os.path.join(self.content, "blog", "elf", "index.md"), "# Elf\n\nRing bearer")
+        self.build()
+        incremental = self.postings_by_url()
+
+        os.remove(self.index_path)
+        self.build()
+
+        self.assertEqual(self.postings_by_url(), incremental)
+        self.assertNotIn("mithril", incremental)
+        self.assertEqual([("/", 1)], incremental["hobbits"])
+
+
+if __name__ == '__main__':
+    unittest.main()
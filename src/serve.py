@@ -0,0 +1,181 @@
+import io
+import os
+import threading
+import urllib.parse
+from collections import OrderedDict
+from functools import partial
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import BinaryIO
+
+from etags import ETAG_MANIFEST_NAME, data_etag, load_etags
+from file_utils import output_identity
+
+HOT_CACHE_BYTES = 64 * 1024 * 1024
+MAX_CACHED_FILE_BYTES = 1024 * 1024
+# preferred first
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class SiteFiles:
+    def __init__(self, directory: str, cache_bytes: int = HOT_CACHE_BYTES):
+        self.directory = directory
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self._cache = OrderedDict()
+        self._etags = {}
+        self._etags_identity = None
+        self._lock = threading.Lock()
+
+    def etags(self) -> dict[str, list]:
+        # every build replaces the manifest, so a new inode or mtime means it has to be read again
+        identity = output_identity(os.path.join(self.directory, ETAG_MANIFEST_NAME))
+        if identity != self._etags_identity:
+            etags = load_etags(self.directory)
+            with self._lock:
+                self._etags, self._etags_identity = etags, identity
+        return self._etags
+
+    def open(self, path: str, key: str) -> tuple[int, float, bytes | BinaryIO, str]:
+        # returns the size, mtime, body and etag; the body is a file to stream when it is too large to keep
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached[0] == (stat.st_ino, stat.st_mtime_ns, stat.st_size):
+                self._cache.move_to_end(path)
+                return stat.st_size, stat.st_mtime, cached[1], cached[2]
+        file = open(path, "rb")
+        stat = os.fstat(file.fileno())
+        entry = self.etags().get(key)
+        etag = entry[2] if entry is not None and entry[:2] == [stat.st_size, stat.st_mtime_ns] else None
+        if stat.st_size > min(MAX_CACHED_FILE_BYTES, self.cache_bytes):
+            return stat.st_size, stat.st_mtime, file, etag or f'W/"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        with file:
+            data = file.read()
+        etag = etag or data_etag(data)
+        with self._lock:
+            previous = self._cache.pop(path, None)
+            if previous is not None:
+                self.cached_bytes -= len(previous[1])
+            self._cache[path] = ((stat.st_ino, stat.st_mtime_ns, stat.st_size), data, etag)
+            self.cached_bytes += len(data)
+            while self.cached_bytes > self.cache_bytes:
+                _, (_, evicted, _) = self._cache.popitem(last=False)
+                self.cached_bytes -= len(evicted)
+        return stat.st_size, stat.st_mtime, data, etag
+
+
+class SiteRequestHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args, site: SiteFiles, quiet: bool = False, **kwargs):
+        self.site = site
+        self.quiet = quiet
+        super().__init__(*args, directory=site.directory, **kwargs)
+
+    def send_head(self) -> None | BinaryIO:
+        url_path = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        # build state such as the etag and shard manifests is not part of the site
+        if any(part.startswith(".") for part in url_path.split("/")):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index_path = os.path.join(path, "index.html")
+            if not url_path.endswith("/") or not os.path.isfile(index_path):
+                return super().send_head()
+            path = index_path
+        if not os.path.isfile(path):
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+
+        encoding, served_path, varies = self.select_encoding(path)
+        key = os.path.relpath(served_path, self.directory).replace(os.sep, "/")
+        try:
+            size, mtime, body, etag = self.site.open(served_path, key)
+        except FileNotFoundError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return None
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            if not isinstance(body, bytes):
+                body.close()
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            if varies:
+                self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return None
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(size))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(mtime))
+        if encoding is not None:
+            self.send_header("Content-Encoding", encoding)
+        if varies:
+            self.send_header("Vary", "Accept-Encoding")
+        self.end_headers()
+        return io.BytesIO(body) if isinstance(body, bytes) else body
+
+    def select_encoding(self, path: str) -> tuple[None | str, str, bool]:
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        selected = None
+        varies = False
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if os.path.isfile(path + suffix):
+                varies = True
+                if selected is None and encoding in accepted:
+                    selected = (encoding, path + suffix)
+        if selected is None:
+            return None, path, varies
+        return selected[0], selected[1], varies
+
+    def log_request(self, code="-", size="-"):
+        if not self.quiet:
+            super().log_request(code, size)
+
+    def log_error(self, format, *args):
+        if not self.quiet:
+            super().log_error(format, *args)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    accepted = set()
+    for item in header.split(","):
+        name, _, parameters = item.partition(";")
+        parameters = parameters.strip().replace(" ", "")
+        if parameters.startswith("q="):
+            try:
+                if float(parameters[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def etag_matches(header: None | str, etag: str) -> bool:
+    # If-None-Match uses the weak comparison
+    if header is None:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+
+
+class SiteServer(ThreadingHTTPServer):
+    request_queue_size = 128
+
+
+def create_server(
+    directory: str,
+    port: int,
+    host: str = "",
+    quiet: bool = False,
+    cache_bytes: int = HOT_CACHE_BYTES,
+) -> SiteServer:
+    handler = partial(SiteRequestHandler, site=SiteFiles(directory, cache_bytes), quiet=quiet)
+    server = SiteServer((host, port), handler)
+    print(f"Serving {directory} on http://localhost:{server.server_address[1]}/")
+    return server
@@ -0,0 +1,81 @@
+import contextlib
+import gzip
+import http.client
+import io
+import os
+import threading
+import unittest
+
+from etags import write_etags
+from serve import accepted_encodings, create_server, etag_matches
+from test_helpers import TempDirTestCase, read_file, write_file
+
+
+class ServeTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = self.tmp.name
+        self.write("index.html", b"<h1>Home</h1>")
+        self.write("index.css", b"body{}" * 100)
+        self.write("index.css.gz", gzip.compress(b"body{}" * 100))
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_etags(self.public)
+            self.server = create_server(self.public, 0, "127.0.0.1", quiet=True)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1])
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def write(self, relpath, data):
+        write_file(os.path.join(self.public, relpath), data)
+
+    def get(self, path, **headers):
+        self.connection.request("GET", path, headers=headers)
+        response = self.connection.getresponse()
+        return response, response.read()
+
+    def test_it_serves_with_build_time_etags_over_one_connection(self):
+        response, body = self.get("/")
+        self.assertEqual((200, b"<h1>Home</h1>"), (response.status, body))
+        etag = response.getheader("ETag")
+        self.assertIn(etag.strip('"'), read_file(os.path.join(self.public, ".etags.json")))
+
+        response, body = self.get("/", **{"If-None-Match": etag})
+        self.assertEqual((304, b""), (response.status, body))
+
+    def test_it_serves_precompressed_siblings(self):
+        response, body = self.get("/index.css", **{"Accept-Encoding": "br;q=0, gzip"})
+        self.assertEqual("gzip", response.getheader("Content-Encoding"))
+        self.assertEqual("Accept-Encoding", response.getheader("Vary"))
+        self.assertEqual(b"body{}" * 100, gzip.decompress(body))
+
+        response, body = self.get("/index.css", **{"Accept-Encoding": "gzip;q=0"})
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(b"body{}" * 100, body)
+
+    def test_it_notices_replaced_files(self):
+        response, _ = self.get("/index.html")
+        self.write("index.html.tmp", b"<h1>Changed</h1>")
+        os.replace(os.path.join(self.public, "index.html.tmp"), os.path.join(self.public, "index.html"))
+
+        changed, body = self.get("/index.html", **{"If-None-Match": response.getheader("ETag")})
+        self.assertEqual((200, b"<h1>Changed</h1>"), (changed.status, body))
+
+    def test_it_hides_build_state(self):
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            self.assertEqual(404, self.get("/.etags.json")[0].status)
+        self.assertEqual("", stderr.getvalue())
+
+    def test_header_parsing(self):
+        self.assertEqual({"gzip", "br"}, accepted_encodings("gzip, deflate;q=0, br;q=0.5"))
+        self.assertTrue(etag_matches('"a", W/"b"', '"b"'))
+        self.assertTrue(etag_matches("*", '"b"'))
+        self.assertFalse(etag_matches('"a"', '"b"'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import hashlib
+import json
+import os
+
+from copy_contents import ensure_directory, sync_file
+from file_utils import temporary_path
+
+SHARD_MANIFEST_NAME = ".shard.json"
+
+
+def parse_shard(value: str) -> tuple[int, int]:
+    index, _, count = value.partition("/")
+    if not index.isdigit() or not count.isdigit() or not 1 <= int(index) <= int(count):
+        raise ValueError(f"Invalid shard {value!r}, expected i/N with 1 <= i <= N")
+    return int(index), int(count)
+
+
+def shard_key(from_path: str, dir_path_content: str) -> str:
+    return os.path.relpath(from_path, dir_path_content).replace(os.sep, "/")
+
+
+def shard_of(key: str, count: int) -> int:
+    # a content hash rather than hash() so every machine agrees on the partition
+    digest = hashlib.sha256(key.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def write_shard_manifest(
+    dest_dir_path: str,
+    shard: tuple[int, int],
+    pages: list[tuple[str, str]],
+    dir_path_content: str,
+) -> None:
+    entries = {
+        shard_key(from_path, dir_path_content): os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+        for from_path, dest_path in pages
+    }
+    manifest_path = os.path.join(dest_dir_path, SHARD_MANIFEST_NAME)
+    tmp_path = temporary_path(manifest_path)
+    with open(tmp_path, "w") as file:
+        json.dump({"shard": list(shard), "pages": entries}, file, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def load_shard_manifest(shard_dir: str) -> dict:
+    manifest_path = os.path.join(shard_dir, SHARD_MANIFEST_NAME)
+    if not os.path.isfile(manifest_path):
+        raise ValueError(f"{shard_dir} is not a shard build, {SHARD_MANIFEST_NAME} is missing")
+    with open(manifest_path) as file:
+        return json.load(file)
+
+
+def merge_shards(shard_dirs: list[str], expected_keys: set[str], dest_dir_path: str) -> dict[str, int]:
+    manifests = [load_shard_manifest(shard_dir) for shard_dir in shard_dirs]
+    counts = {manifest["shard"][1] for manifest in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"Shards were built with different shard counts: {sorted(counts)}")
+    count = counts.pop()
+    indexes = sorted(manifest["shard"][0] for manifest in manifests)
+    if indexes != list(range(1, count + 1)):
+        raise ValueError(f"Expected shards 1 to {count} exactly once, got {indexes}")
+
+    owners = {}
+    duplicates = set()
+    for shard_dir, manifest in zip(shard_dirs, manifests):
+        for key, output in manifest["pages"].items():
+            if key in owners:
+                duplicates.add(key)
+            owners[key] = (shard_dir, output)
+    if duplicates:
+        raise ValueError(f"Pages built by more than one shard: {', '.join(sorted(duplicates))}")
+    missing = expected_keys - owners.keys()
+    if missing:
+        raise ValueError(f"Pages not built by any shard: {', '.join(sorted(missing))}")
+    unexpected = owners.keys() - expected_keys
+    if unexpected:
+        raise ValueError(f"Shards contain pages that no longer exist: {', '.join(sorted(unexpected))}")
+
+    stats = {"copied": 0, "linked": 0, "unchanged": 0, "removed": 0, "bytes": 0}
+    for key in sorted(owners):
+        shard_dir, output = owners[key]
+        src = os.path.join(shard_dir, output)
+        if not os.path.isfile(src):
+            raise ValueError(f"Shard {shard_dir} lists {key} but {output} is missing")
+        dst = os.path.join(dest_dir_path, output)
+        ensure_directory(os.path.dirname(dst))
+        # copies, not links: a later shard build rewrites its outputs in place
+        sync_file(src, os.stat(src), dst, False, None, stats)
+    print(f"Merged {len(owners)} pages from {count} shards: {stats['copied']} copied, {stats['unchanged']} unchanged")
+    return stats
@@ -0,0 +1,91 @@
+import contextlib
+import io
+import os
+import unittest
+
+from generate_pages_recursive import generate_pages_recursive
+from shard import merge_shards, parse_shard, shard_key, shard_of, write_shard_manifest
+from test_helpers import TempDirTestCase, write_file
+
+
+class ShardTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        write_file(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.keys = {f"blog/post-{i}/index.md" for i in range(12)} | {"index.md"}
+        for key in self.keys:
+            write_file(os.path.join(self.content, key), f"# {key}\n\nHello")
+
+    def build_shard(self, shard):
+        shard_dir = os.path.join(self.tmp.name, f"shard-{shard[0]}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            pages = generate_pages_recursive(self.content, self.template, shard_dir, shard=shard)
+        write_shard_manifest(shard_dir, shard, pages, self.content)
+        return shard_dir
+
+    def merge(self, shard_dirs, keys=None):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return merge_shards(shard_dirs, self.keys if keys is None else keys, self.public)
+
+    def test_parse_shard(self):
+        self.assertEqual((2, 3), parse_shard("2/3"))
+        for value in ("0/3", "4/3", "3", "a/b"):
+            with self.assertRaises(ValueError):
+                parse_shard(value)
+
+    def test_partition_is_stable_and_covers_every_page(self):
+        self.assertEqual(shard_of("blog/post-1/index.md", 4), shard_of("blog/post-1/index.md", 4))
+        self.assertEqual(
+            os.path.join("blog", "post", "index.md").replace(os.sep, "/"),
+            shard_key(os.path.join(self.content, "blog", "post", "index.md"), self.content),
+        )
+        self.assertEqual({1, 2, 3}, {shard_of(key, 3) for key in self.keys})
+
+    def test_merge_combines_all_shards(self):
+        shard_dirs = [self.build_shard((i, 3)) for i in (1, 2, 3)]
+
+        stats = self.merge(shard_dirs)
+
+        self.assertEqual(len(self.keys), stats["copied"])
+        for key in self.keys:
+            self.assertTrue(os.path.isfile(os.path.join(self.public, key[:-2] + "html")))
+
+    def test_merge_rejects_missing_shards_and_pages(self):
+        shard_dirs = [self.build_shard((i, 3)) for i in (1, 2, 3)]
+
+        with self.assertRaisesRegex(ValueError, "exactly once"):
+            self.merge(shard_dirs[:2])
+        with self.assertRaisesRegex(ValueError, "not built by any shard"):
+            self.merge(shard_dirs, self.keys | {"new/index.md"})
+
+    def test_merge_rejects_pages_built_twice(self):
+        shard_dirs = [self.build_shard((i, 2)) for i in (1, 2)]
+        home = os.path.join(self.content, "index.md")
+        for shard, shard_dir in enumerate(shard_dirs, start=1):
+            write_file(os.path.join(shard_dir, "index.html"), "home")
+            write_shard_manifest(shard_dir, (shard, 2), [(home, os.path.join(shard_dir, "index.html"))], self.content)
+
+        with self.assertRaisesRegex(ValueError, "more than one shard: index.md"):
+            self.merge(shard_dirs, {"index.md"})
+
+
+    def test_a_shard_build_keeps_the_other_shards_outputs(self):
+        manifest = os.path.join(self.tmp.name, ".build", "manifest.json")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_pages_recursive(self.content, self.template, self.public, manifest)
+        deleted = next(key for key in sorted(self.keys) if shard_of(key, 2) == 1)
+        os.remove(os.path.join(self.content, deleted))
+
+        with contextlib.redirect_stdout(io.StringIO()) as output:
+            generate_pages_recursive(self.content, self.template, self.public, manifest, shard=(1, 2))
+
+        self.assertIn("removed 1 stale outputs", output.getvalue())
+        for key in self.keys - {deleted}:
+            self.assertTrue(os.path.isfile(os.path.join(self.public, key[:-2] + "html")), key)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import shutil
+
+from file_utils import make_directories, remove_tree, temporary_path
+
+
+class StagedOutput:
+    def __init__(self, live_path: str, releases_path: str):
+        self.live_path = live_path
+        self.releases_path = releases_path
+        self.path = None
+
+    def live_release(self) -> None | str:
+        if not os.path.islink(self.live_path):
+            return None
+        live = os.path.realpath(self.live_path)
+        if os.path.dirname(live) != os.path.realpath(self.releases_path) or not os.path.basename(live).isdigit():
+            raise ValueError(f"{self.live_path} links to {live}, which is not a release in {self.releases_path}")
+        return live
+
+    def prepare(self) -> str:
+        if not os.path.isdir(self.releases_path):
+            os.makedirs(self.releases_path)
+        live = self.live_release()
+        generation = 0 if live is None else int(os.path.basename(live))
+        self.path = os.path.join(self.releases_path, str(generation + 1))
+        # the release before the live one is only removed now, so requests that were still reading it
+        # when it was swapped out had a whole build to finish
+        for name in os.listdir(self.releases_path):
+            release = os.path.realpath(os.path.join(self.releases_path, name))
+            if release not in (live, os.path.realpath(self.path)):
+                remove_tree(release)
+        if os.path.isdir(self.path):
+            # a build that failed left its staging directory behind, and the build manifests describe it
+            print(f"Resuming staged build in {self.path}")
+            return self.path
+        tmp_path = f"{self.path}.tmp"
+        if os.path.isdir(self.live_path):
+            stats = link_tree(self.live_path, tmp_path)
+            print(f"Staged {stats['linked']} files from the live output: {stats['copied']} copied")
+        else:
+            os.makedirs(tmp_path)
+        os.rename(tmp_path, self.path)
+        return self.path
+
+    def commit(self) -> None:
+        if self.path is None:
+            raise ValueError("Nothing is staged, call prepare() first")
+        if os.path.isdir(self.live_path) and not os.path.islink(self.live_path):
+            # the first staged build moves the plain output directory aside, the only step that is not atomic
+            os.rename(self.live_path, os.path.join(self.releases_path, "0"))
+        link_path = temporary_path(self.live_path)
+        os.symlink(os.path.relpath(self.path, os.path.dirname(self.live_path)), link_path)
+        os.replace(link_path, self.live_path)
+        print(f"Published {self.path}")
+        self.path = None
+
+
+def live_output(live_path: str) -> str:
+    # a plain build after a staged one updates the live release in place instead of replacing the link
+    # with an empty directory
+    if os.path.islink(live_path):
+        return os.path.realpath(live_path)
+    return live_path
+
+
+def link_tree(source: str, destination: str) -> dict[str, int]:
+    stats = {"linked": 0, "copied": 0}
+    make_directories(destination)
+    directories = [(os.path.realpath(source), destination)]
+    while directories:
+        src_dir, dst_dir = directories.pop()
+        with os.scandir(src_dir) as entries:
+            for entry in entries:
+                dst = os.path.join(dst_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    os.mkdir(dst)
+                    directories.append((entry.path, dst))
+                    continue
+                try:
+                    os.link(entry.path, dst, follow_symlinks=False)
+                    stats["linked"] += 1
+                except OSError:
+                    shutil.copy2(entry.path, dst, follow_symlinks=False)
+                    stats["copied"] += 1
+    return stats
@@ -0,0 +1,93 @@
+import contextlib
+import io
+import os
+import unittest
+
+from copy_contents import copy_contents
+from staging import StagedOutput, live_output
+from test_helpers import TempDirTestCase, read_file, write_file
+
+
+class StagedOutputTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.releases = os.path.join(self.tmp.name, ".build", "releases")
+
+    def write(self, dir_path, relpath, text):
+        write_file(os.path.join(dir_path, relpath), text)
+
+    def read(self, relpath):
+        return read_file(os.path.join(self.public, relpath))
+
+    def prepare(self, output):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return output.prepare()
+
+    def commit(self, output):
+        with contextlib.redirect_stdout(io.StringIO()):
+            output.commit()
+
+    def test_it_swaps_in_a_hardlinked_copy_of_the_live_output(self):
+        self.write(self.public, "index.html", "old")
+        self.write(self.public, "blog/tom.html", "tom")
+        output = StagedOutput(self.public, self.releases)
+        stage = self.prepare(output)
+        self.assertEqual(os.stat(os.path.join(stage, "blog/tom.html")).st_ino,
+                         os.stat(os.path.join(self.public, "blog/tom.html")).st_ino)
+        self.write(stage, "index.html.tmp", "new")
+        os.replace(os.path.join(stage, "index.html.tmp"), os.path.join(stage, "index.html"))
+        self.assertEqual("old", self.read("index.html"))
+
+        self.commit(output)
+        self.assertTrue(os.path.islink(self.public))
+        self.assertEqual("new", self.read("index.html"))
+        self.assertEqual("tom", self.read("blog/tom.html"))
+
+    def test_a_failed_build_leaves_the_live_output_alone_and_is_resumed(self):
+        output = StagedOutput(self.public, self.releases)
+        self.write(self.prepare(output), "index.html", "first")
+        self.commit(output)
+
+        stage = self.prepare(output)
+        os.remove(os.path.join(stage, "index.html"))
+        self.assertEqual("first", self.read("index.html"))
+        self.assertEqual(stage, self.prepare(StagedOutput(self.public, self.releases)))
+        self.assertFalse(os.path.exists(os.path.join(stage, "index.html")))
+
+    def test_only_the_live_release_is_kept_for_the_next_build(self):
+        output = StagedOutput(self.public, self.releases)
+        for text in ("1", "2", "3"):
+            self.write(self.prepare(output), "index.html", text)
+            self.commit(output)
+        self.prepare(output)
+        self.assertEqual(["3", "4"], sorted(os.listdir(self.releases)))
+        self.assertEqual("3", self.read("index.html"))
+
+    def test_it_refuses_a_live_link_that_is_not_a_release(self):
+        other = os.path.join(self.tmp.name, "elsewhere")
+        os.makedirs(other)
+        os.symlink(other, self.public)
+        with self.assertRaisesRegex(ValueError, "not a release"):
+            StagedOutput(self.public, self.releases).prepare()
+        self.assertTrue(os.path.isdir(other))
+
+    def test_a_plain_build_updates_the_live_release(self):
+        output = StagedOutput(self.public, self.releases)
+        self.write(self.prepare(output), "index.html", "staged")
+        self.commit(output)
+        static = os.path.join(self.tmp.name, "static")
+        self.write(static, "index.css", "body{}")
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            manifest_path = os.path.join(self.tmp.name, ".build", "static.json")
+            copy_contents(static, live_output(self.public), sync=True, manifest_path=manifest_path)
+
+        self.assertTrue(os.path.islink(self.public))
+        self.assertEqual(["1"], os.listdir(self.releases))
+        self.assertEqual("staged", self.read("index.html"))
+        self.assertEqual("body{}", self.read("index.css"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, TextIO
+
+SLOT_PATTERN = re.compile(r"{{\s*(\w+)\s*}}")
+
+
+class Template:
+    def __init__(self, source: str):
+        self.source = source
+        self.literals = []
+        self.slot_names = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            self.literals.append(source[position:match.start()])
+            self.slot_names.append(match.group(1))
+            position = match.end()
+        self.literals.append(source[position:])
+        self.slots = frozenset(self.slot_names)
+        self.repeated_slots = frozenset(name for name in self.slots if self.slot_names.count(name) > 1)
+
+    def render(self, **values: str) -> str:
+        self.check_slots(values)
+        parts = [self.literals[0]]
+        for name, literal in zip(self.slot_names, self.literals[1:]):
+            parts.append(values[name])
+            parts.append(literal)
+        return "".join(parts)
+
+    def stream(self, **values: str | Iterable[str]) -> Iterator[str]:
+        self.check_slots(values)
+        yield self.literals[0]
+        for name, literal in zip(self.slot_names, self.literals[1:]):
+            value = values[name]
+            if name in self.repeated_slots and not isinstance(value, str):
+                value = values[name] = "".join(value)
+            if isinstance(value, str):
+                yield value
+            else:
+                yield from value
+            yield literal
+
+    def render_to(self, file: TextIO, **values: str | Iterable[str]) -> None:
+        file.writelines(self.stream(**values))
+
+    def check_slots(self, values: dict[str, object]) -> None:
+        unknown = values.keys() - self.slots
+        if unknown:
+            raise ValueError(f"Unknown template slot(s): {', '.join(sorted(unknown))}")
+        missing = self.slots - values.keys()
+        if missing:
+            raise ValueError(f"Missing value(s) for template slot(s): {', '.join(sorted(missing))}")
+
+    def __repr__(self):
+        return f"Template({self.slot_names})"
+
+
+def load_template(path: str) -> Template:
+    stat = os.stat(path)
+    return _compile_template_file(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=8)
+def _compile_template_file(path: str, mtime_ns: int, size: int) -> Template:
+    with open(path) as file:
+        return Template(file.read())
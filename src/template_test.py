@@ -0,0 +1,56 @@
+import os
+import tempfile
+import unittest
+
+from template import Template, load_template
+
+
+class TemplateTest(unittest.TestCase):
+    def test_it_renders_all_slots(self):
+        template = Template("<title>{{ Title }}</title><h1>{{Title}}</h1>{{ Content }}")
+
+        html = template.render(Title="Hello", Content="<p>World</p>")
+
+        self.assertEqual("<title>Hello</title><h1>Hello</h1><p>World</p>", html)
+
+    def test_it_does_not_substitute_inside_values(self):
+        template = Template("{{ Title }}|{{ Content }}")
+
+        html = template.render(Title="{{ Content }}", Content="body")
+
+        self.assertEqual("{{ Content }}|body", html)
+
+    def test_it_renders_templates_without_slots(self):
+        self.assertEqual("static", Template("static").render())
+
+    def test_it_rejects_unknown_slots(self):
+        template = Template("{{ Title }}")
+
+        with self.assertRaises(ValueError) as context:
+            template.render(Title="Hello", Author="Tolkien")
+        self.assertIn("Author", str(context.exception))
+
+    def test_it_rejects_missing_slots(self):
+        template = Template("{{ Title }}{{ Content }}")
+
+        with self.assertRaises(ValueError) as context:
+            template.render(Title="Hello")
+        self.assertIn("Content", str(context.exception))
+
+    def test_load_template_is_cached_until_the_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "template.html")
+            with open(path, "w") as file:
+                file.write("{{ Title }}")
+
+            first = load_template(path)
+            self.assertIs(first, load_template(path))
+
+            with open(path, "w") as file:
+                file.write("<b>{{ Title }}</b>")
+            os.utime(path, ns=(0, 0))
+            self.assertEqual("<b>Hi</b>", load_template(path).render(Title="Hi"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,8 @@ class TextType(Enum):
         return self.value == other or isinstance(other, Enum) and self.value == other.value
 
 class TextNode:
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text: str, text_type: TextType, url: str = None):
         self.text = text
         self.text_type = text_type
@@ -1,13 +1,24 @@
+import io
 import re
-from typing import Callable
+from typing import Callable, Iterable, Iterator
 from itertools import chain
 
+from block_cache import BlockCache
 from block_type import BlockType
 from html_node import HTMLNode, LeafNode, ParentNode
+from instrumentation import PageProfile, count_nodes
+from metadata import strip_front_matter
+from render_context import RenderContext
 from text_node import TextNode, TextType
 
+INLINE_DELIMITER_PATTERN = re.compile(r"_|\*\*|`")
+INLINE_DELIMITER_TYPES = {"_": TextType.ITALIC, "**": TextType.BOLD, "`": TextType.CODE}
+IMAGE_PATTERN = re.compile(r"!\[([^]]+)]\(([^)]+)\)")
+LINK_PATTERN = re.compile(r"\[([^]]+)]\(([^)]+)\)")
+HEADING_PATTERN = re.compile(r"^#{1,6} ")
 
-def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
+
+def text_node_to_html_node(text_node: TextNode, context: RenderContext = None) -> HTMLNode:
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(tag=None, value=text_node.text)
@@ -18,9 +29,14 @@ def text_node_to_html_node(text_node: TextNode) -> HTMLNode:
         case TextType.CODE:
             return LeafNode(tag="code", value=text_node.text)
         case TextType.LINK:
-            return LeafNode(tag="a", value=text_node.text, props={"href": text_node.url})
+            url = text_node.url if context is None else context.url(text_node.url)
+            return LeafNode(tag="a", value=text_node.text, props={"href": url})
         case TextType.IMAGE:
-            return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.text})
+            if context is None:
+                return LeafNode(tag="img", value="", props={"src": text_node.url, "alt": text_node.text})
+            props = {"src": context.url(text_node.url), "alt": text_node.text}
+            props.update(context.image_attributes(text_node.url))
+            return LeafNode(tag="img", value="", props=props)
         case _:
             raise ValueError(f"Invalid text type: {text_node.text_type}")
 
@@ -51,11 +67,11 @@ def split_nodes_delimiter(old_nodes: list[TextNode], delimiter: str, text_type:
 
 
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"!\[([^]]+)]\(([^)]+)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"\[([^]]+)]\(([^)]+)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
 def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
@@ -111,35 +127,133 @@ def _split_nodes(
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
-    nodes = [TextNode(text=text, text_type=TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
+    # Single scan equivalent to splitting on "_", then "**", then "`", then images, then links:
+    # italic sections keep other delimiters literally, bold sections keep "`" literally and
+    # any other delimiter inside a formatted section leaves a section unclosed.
+    nodes = []
+    open_delimiter = None
+    start = 0
+    for match in INLINE_DELIMITER_PATTERN.finditer(text):
+        delimiter = match.group()
+        if open_delimiter is None:
+            _append_text_nodes(nodes, text, start, match.start())
+            open_delimiter = delimiter
+            start = match.end()
+        elif delimiter == open_delimiter:
+            if match.start() > start:
+                nodes.append(TextNode(text[start:match.start()], INLINE_DELIMITER_TYPES[delimiter]))
+            open_delimiter = None
+            start = match.end()
+        elif open_delimiter != "_" and not (open_delimiter == "**" and delimiter == "`"):
+            raise ValueError("invalid markdown, formatted section not closed")
+    if open_delimiter is not None:
+        raise ValueError("invalid markdown, formatted section not closed")
+    _append_text_nodes(nodes, text, start, len(text))
     return nodes
 
 
+def _append_text_nodes(nodes: list[TextNode], text: str, start: int, end: int) -> None:
+    if start == end:
+        return
+    for match in IMAGE_PATTERN.finditer(text, start, end):
+        _append_link_nodes(nodes, text, start, match.start())
+        nodes.append(TextNode(match.group(1), TextType.IMAGE, match.group(2)))
+        start = match.end()
+    _append_link_nodes(nodes, text, start, end)
+
+
+def _append_link_nodes(nodes: list[TextNode], text: str, start: int, end: int) -> None:
+    for match in LINK_PATTERN.finditer(text, start, end):
+        if match.start() > start:
+            nodes.append(TextNode(text[start:match.start()], TextType.TEXT))
+        nodes.append(TextNode(match.group(1), TextType.LINK, match.group(2)))
+        start = match.end()
+    if end > start:
+        nodes.append(TextNode(text[start:end], TextType.TEXT))
+
+
 def markdown_to_blocks(markdown: str) -> list[str]:
-    return list(filter(lambda block: block != "", map(lambda block: block.strip(), markdown.split("\n\n"))))
+    return ["\n".join(lines) for _, lines in iter_blocks(io.StringIO(markdown))]
+
+
+def iter_blocks(lines: Iterable[str]) -> Iterator[tuple[BlockType, list[str]]]:
+    # Equivalent to splitting on "\n\n" and stripping every block, but only one block is held at a time:
+    # whitespace-only lines are kept pending until a later line shows they are inside the block.
+    block = []
+    pending = []
+    classifier = BlockClassifier()
+    for line in lines:
+        line = line.removesuffix("\n")
+        if line == "":
+            if block:
+                yield _finish_block(block, classifier)
+                block, pending, classifier = [], [], BlockClassifier()
+            continue
+        if line.isspace():
+            if block:
+                pending.append(line)
+            continue
+        if not block:
+            line = line.lstrip()
+        else:
+            classifier.feed(block[-1])
+            for pending_line in pending:
+                classifier.feed(pending_line)
+            block.extend(pending)
+            pending = []
+        block.append(line)
+    if block:
+        yield _finish_block(block, classifier)
+
+
+def _finish_block(block: list[str], classifier: 'BlockClassifier') -> tuple[BlockType, list[str]]:
+    block[-1] = block[-1].rstrip()
+    classifier.feed(block[-1])
+    return classifier.block_type(), block
+
+
+class BlockClassifier:
+    def __init__(self):
+        self.count = 0
+        self.first_line = ""
+        self.last_line = ""
+        self.quote = True
+        self.unordered_list = True
+        self.ordered_list = True
+
+    def feed(self, line: str) -> None:
+        self.count += 1
+        if self.count == 1:
+            self.first_line = line
+        self.last_line = line
+        self.quote = self.quote and line.startswith(">")
+        self.unordered_list = self.unordered_list and line.startswith("- ")
+        self.ordered_list = self.ordered_list and line.startswith(f"{self.count}. ")
+
+    def block_type(self) -> BlockType:
+        if HEADING_PATTERN.match(self.first_line):
+            return BlockType.HEADING
+        if self.count >= 3 and self.first_line == "```" and self.last_line == "```":
+            return BlockType.CODE
+        if self.quote:
+            return BlockType.QUOTE
+        if self.unordered_list:
+            return BlockType.UNORDERED_LIST
+        if self.ordered_list:
+            return BlockType.ORDERED_LIST
+        return BlockType.PARAGRAPH
 
 
 def block_to_block_type(block: str) -> BlockType:
-    if is_heading_block(block):
-        return BlockType.HEADING
-    if is_code_block(block):
-        return BlockType.CODE
-    if is_quote_block(block):
-        return BlockType.QUOTE
-    if is_unordered_list_block(block):
-        return BlockType.UNORDERED_LIST
-    if is_ordered_list_block(block):
-        return BlockType.ORDERED_LIST
-    return BlockType.PARAGRAPH
+    classifier = BlockClassifier()
+    for line in block.splitlines():
+        classifier.feed(line)
+    return classifier.block_type()
 
 
+# whole-block versions of the BlockClassifier checks, kept as the reference the classifier is tested against
 def is_heading_block(block: str) -> bool:
-    return bool(re.match(r"^#{1,6} ", block))
+    return bool(HEADING_PATTERN.match(block))
 
 
 def is_code_block(block: str) -> bool:
@@ -172,45 +286,119 @@ def is_ordered_list_block(block: str) -> bool:
     return True
 
 
-def markdown_to_html_node(markdown: str) -> HTMLNode:
-    root_node = HTMLNode(tag="div", children=[])
-    blocks = markdown_to_blocks(markdown)
-    for block in blocks:
-        block_type = block_to_block_type(block)
-        match block_type:
-            case BlockType.HEADING:
-                html_node = heading_block_to_html_node(block)
-            case BlockType.CODE:
-                html_node = code_block_to_html_node(block)
-            case BlockType.QUOTE:
-                html_node = quote_block_to_html_node(block)
-            case BlockType.UNORDERED_LIST:
-                html_node = unordered_list_block_to_html_node(block)
-            case BlockType.ORDERED_LIST:
-                html_node = ordered_list_block_to_html_node(block)
-            case _:
-                html_node = paragraph_block_to_html_node(block)
-        root_node.children.append(html_node)
-    return root_node
-
-
-def heading_block_to_html_node(block: str) -> HTMLNode:
+def markdown_to_html_node(
+    markdown: str | Iterable[str],
+    cache: BlockCache = None,
+    context: RenderContext = None,
+) -> HTMLNode:
+    return HTMLNode(tag="div", children=list(iter_block_nodes(markdown, cache, context)))
+
+
+def markdown_to_html(
+    markdown: str | Iterable[str],
+    cache: BlockCache = None,
+    context: RenderContext = None,
+    profile: PageProfile = None,
+) -> Iterator[str]:
+    # the same output as markdown_to_html_node(...).iter_html(), holding only one block's nodes at a time
+    if profile is None:
+        yield "<div>"
+        for node in iter_block_nodes(markdown, cache, context):
+            yield from node.iter_html()
+        yield "</div>"
+        return
+    profile.nodes += 1
+    yield "<div>"
+    for node in profile.timed("parse", iter_block_nodes(markdown, cache, context, profile)):
+        yield from profile.timed("render", node.iter_html())
+    yield "</div>"
+
+
+def iter_block_nodes(
+    markdown: str | Iterable[str],
+    cache: BlockCache = None,
+    context: RenderContext = None,
+    profile: PageProfile = None,
+) -> Iterator[HTMLNode]:
+    if isinstance(markdown, str):
+        markdown = io.StringIO(markdown)
+    if context is not None:
+        context.start_page()
+    minify = context is not None and context.minify is not None
+    for block_type, lines in iter_blocks(strip_front_matter(markdown)):
+        block = "\n".join(lines)
+        # until the eager images are used up, a block with an image depends on its position in the page
+        if cache is None or (context is not None and not context.is_position_independent(block)):
+            node = block_to_html_node(block_type, block, context, profile)
+            if profile is not None:
+                # counted before minifying folds the block into one leaf
+                profile.nodes += count_nodes(node)
+            if minify:
+                html, saved = context.minify_block(node, measure=profile is not None)
+                node = LeafNode(tag=None, value=html)
+                if profile is not None:
+                    profile.bytes_saved += saved
+            yield node
+            continue
+        key = cache.key(block, "" if context is None else context.salt)
+        entry = cache.get(key)
+        if entry is None:
+            node = block_to_html_node(block_type, block, context, profile)
+            # the entry keeps what a profile of the block needs, so a hit reports the same as a miss
+            html, saved = context.minify_block(node, measure=True) if minify else (node.to_html(), 0)
+            nodes = count_nodes(node)
+            cache.put(key, html, nodes, saved)
+        else:
+            html, nodes, saved = entry
+            if context is not None and context.terms is not None:
+                # a cached block skips inline parsing, so its terms come from the stored HTML
+                context.add_html(html)
+        if profile is not None:
+            profile.nodes += nodes
+            profile.bytes_saved += saved
+        yield LeafNode(tag=None, value=html)
+
+
+def block_to_html_node(
+    block_type: BlockType,
+    block: str,
+    context: RenderContext = None,
+    profile: PageProfile = None,
+) -> HTMLNode:
+    match block_type:
+        case BlockType.HEADING:
+            return heading_block_to_html_node(block, context, profile)
+        case BlockType.CODE:
+            return code_block_to_html_node(block, context)
+        case BlockType.QUOTE:
+            return quote_block_to_html_node(block, context, profile)
+        case BlockType.UNORDERED_LIST:
+            return unordered_list_block_to_html_node(block, context, profile)
+        case BlockType.ORDERED_LIST:
+            return ordered_list_block_to_html_node(block, context, profile)
+        case _:
+            return paragraph_block_to_html_node(block, context, profile)
+
+
+def heading_block_to_html_node(block: str, context: RenderContext = None, profile: PageProfile = None) -> HTMLNode:
     heading_level = len(re.match(r"^(#{1,6}) ", block).group(1))
     heading_text = block[heading_level + 1:]
-    children = text_to_children(heading_text)
+    children = text_to_children(heading_text, context, profile)
     if len(children) == 1:
         return LeafNode(tag=f"h{heading_level}", value=heading_text)
     return ParentNode(tag=f"h{heading_level}", children=children)
 
 
-def code_block_to_html_node(block: str) -> HTMLNode:
+def code_block_to_html_node(block: str, context: RenderContext = None) -> HTMLNode:
     lines = block.splitlines()
     text = "\n".join(lines[1:-1])+"\n"
+    if context is not None and context.terms is not None:
+        context.add_text(text)
     text_node = TextNode(text=text, text_type=TextType.CODE)
     return ParentNode(tag="pre", children=[text_node_to_html_node(text_node)])
 
 
-def quote_block_to_html_node(block: str) -> HTMLNode:
+def quote_block_to_html_node(block: str, context: RenderContext = None, profile: PageProfile = None) -> HTMLNode:
     lines = []
     for line in block.splitlines():
         matches = re.match(r"^>\s*(\S+.*)$", line)
@@ -218,30 +406,38 @@ def quote_block_to_html_node(block: str) -> HTMLNode:
             continue
         lines.append(matches.group(1))
     text = " ".join(lines)
-    children = text_to_children(text)
+    children = text_to_children(text, context, profile)
     if len(children) == 1:
         return LeafNode(tag="blockquote", value=text)
     return ParentNode(tag="blockquote", children=children)
 
 
-def unordered_list_block_to_html_node(block: str) -> HTMLNode:
+def unordered_list_block_to_html_node(
+    block: str,
+    context: RenderContext = None,
+    profile: PageProfile = None,
+) -> HTMLNode:
     unordered_list = ParentNode(tag="ul", children=[])
     list_items = []
     for line in block.splitlines():
         list_items.append(re.match(r"^- (.*)$", line).group(1))
     for text in list_items:
-        children = text_to_children(text)
+        children = text_to_children(text, context, profile)
         unordered_list.children.append(ParentNode(tag="li", children=children))
     return unordered_list
 
 
-def ordered_list_block_to_html_node(block: str) -> HTMLNode:
+def ordered_list_block_to_html_node(
+    block: str,
+    context: RenderContext = None,
+    profile: PageProfile = None,
+) -> HTMLNode:
     ordered_list = ParentNode(tag="ol", children=[])
     list_items = []
     for line in block.splitlines():
         list_items.append(re.match(r"^\d+\. (.*)$", line).group(1))
     for text in list_items:
-        children = text_to_children(text)
+        children = text_to_children(text, context, profile)
         if len(children) == 1:
             ordered_list.children.append(LeafNode(tag="li", value=text))
         else:
@@ -249,11 +445,21 @@ def ordered_list_block_to_html_node(block: str) -> HTMLNode:
     return ordered_list
 
 
-def paragraph_block_to_html_node(block: str) -> HTMLNode:
-    children = text_to_children(block.replace("\n", " "))
+def paragraph_block_to_html_node(block: str, context: RenderContext = None, profile: PageProfile = None) -> HTMLNode:
+    children = text_to_children(block.replace("\n", " "), context, profile)
     return ParentNode(tag="p", children=children)
 
 
-def text_to_children(text: str) -> list[HTMLNode]:
-    nodes = text_to_textnodes(text)
-    return list(map(text_node_to_html_node, nodes))
+def text_to_children(text: str, context: RenderContext = None, profile: PageProfile = None) -> list[HTMLNode]:
+    if profile is None:
+        nodes = text_to_textnodes(text)
+    else:
+        previous = profile.enter("inline")
+        try:
+            nodes = text_to_textnodes(text)
+        finally:
+            profile.enter(previous)
+    if context is not None and context.terms is not None:
+        for node in nodes:
+            context.add_text(node.text)
+    return [text_node_to_html_node(node, context) for node in nodes]
@@ -1,10 +1,13 @@
+import io
+import random
 import unittest
 
 from block_type import BlockType
 from html_node import LeafNode
 from utils import text_node_to_html_node, split_nodes_delimiter, extract_markdown_images, extract_markdown_links, \
     split_nodes_image, split_nodes_link, text_to_textnodes, markdown_to_blocks, block_to_block_type, \
-    markdown_to_html_node
+    markdown_to_html_node, markdown_to_html, iter_blocks, is_heading_block, is_code_block, is_quote_block, \
+    is_unordered_list_block, is_ordered_list_block
 from text_node import TextNode, TextType
 
 
@@ -306,6 +309,38 @@ class UtilsTest(unittest.TestCase):
 
         self.assertListEqual(expected_nodes, actual_nodes)
 
+    def test_text_to_textnodes_matches_split_pipeline(self):
+        def split_pipeline(text):
+            nodes = [TextNode(text, TextType.TEXT)]
+            nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+            nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+            nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+            nodes = split_nodes_image(nodes)
+            return split_nodes_link(nodes)
+
+        def outcome(function, text):
+            try:
+                return function(text)
+            except ValueError:
+                return ValueError
+
+        tokens = ["word", " ", "_", "**", "*", "`", "!", "[", "]", "(", ")", "![alt](/a.png)", "[link](/a_b)"]
+        rng = random.Random(1234)
+        for _ in range(20000):
+            text = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 12)))
+            self.assertEqual(outcome(split_pipeline, text), outcome(text_to_textnodes, text), text)
+
+    def test_text_to_textnodes_keeps_other_delimiters_inside_italic(self):
+        expected_nodes = [TextNode("a **b** `c`", TextType.ITALIC)]
+
+        actual_nodes = text_to_textnodes("_a **b** `c`_")
+
+        self.assertListEqual(expected_nodes, actual_nodes)
+
+    def test_text_to_textnodes_unclosed(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("This is **unclosed")
+
     def test_markdown_to_blocks(self):
         md = """This is **bolded** paragraph
 
@@ -376,6 +411,32 @@ This is the same paragraph on a new line
 
         self.assertListEqual(expected_blocks, actual_blocks)
 
+    def test_iter_blocks_matches_split_and_strip(self):
+        tokens = ["\n", "\n", " ", "\t", "a", "# h", "```", "> q", ">", "- x", "-", "1. a", "2. b", "1."]
+        rng = random.Random(1234)
+        for _ in range(5000):
+            md = "".join(rng.choice(tokens) for _ in range(rng.randint(0, 14)))
+            expected = [block.strip() for block in md.split("\n\n") if block.strip() != ""]
+
+            actual = [(block_type, "\n".join(lines)) for block_type, lines in iter_blocks(io.StringIO(md))]
+
+            self.assertListEqual([(reference_block_type(block), block) for block in expected], actual, md)
+            self.assertListEqual([reference_block_type(block) for block in expected], list(map(block_to_block_type, expected)), md)
+
+    def test_iter_blocks_reads_lines_lazily(self):
+        lines = iter(["# Heading\n", "\n", "- one\n", "- two\n", "\n", "rest\n"])
+        blocks = iter_blocks(lines)
+
+        self.assertEqual((BlockType.HEADING, ["# Heading"]), next(blocks))
+        self.assertEqual("- one\n", next(lines))
+
+    def test_markdown_to_html_node_from_file(self):
+        file = io.StringIO("# Title\n\nSome _text_\n")
+
+        actual_html = markdown_to_html_node(file).to_html()
+
+        self.assertEqual("<div><h1>Title</h1><p>Some <i>text</i></p></div>", actual_html)
+
     def test_block_to_block_type(self):
         md = """This is paragraph
 
@@ -530,5 +591,25 @@ the **same** even with inline stuff
 
         self.assertEqual(expected_html, actual_html)
 
+    def test_markdown_to_html_streams_the_same_html(self):
+        md = "# Title\n\nSome _text_\n\n- a\n- b\n\n```\ncode\n```\n\n> quote"
+
+        self.assertEqual(markdown_to_html_node(md).to_html(), "".join(markdown_to_html(md)))
+
+
+def reference_block_type(block):
+    if is_heading_block(block):
+        return BlockType.HEADING
+    if is_code_block(block):
+        return BlockType.CODE
+    if is_quote_block(block):
+        return BlockType.QUOTE
+    if is_unordered_list_block(block):
+        return BlockType.UNORDERED_LIST
+    if is_ordered_list_block(block):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+import os
+import time
+from typing import Iterator
+
+
+class PollingWatcher:
+    def __init__(self, paths: list[str], interval: float = 0.05):
+        self.paths = paths
+        self.interval = interval
+        self.snapshot = self.scan()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        directories = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                directories.append(path)
+            elif os.path.isfile(path):
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        while directories:
+            try:
+                entries = os.scandir(directories.pop())
+            except FileNotFoundError:
+                continue
+            with entries:
+                for entry in entries:
+                    if entry.is_symlink():
+                        continue
+                    if entry.is_dir():
+                        directories.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> set[str]:
+        snapshot = self.scan()
+        changed = {
+            path
+            for path in snapshot.keys() | self.snapshot.keys()
+            if snapshot.get(path) != self.snapshot.get(path)
+        }
+        self.snapshot = snapshot
+        return changed
+
+    def watch(self) -> Iterator[set[str]]:
+        while True:
+            time.sleep(self.interval)
+            changed = self.poll()
+            if changed:
+                yield changed
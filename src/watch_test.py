@@ -0,0 +1,41 @@
+import os
+import unittest
+
+from test_helpers import TempDirTestCase, write_file
+from watch import PollingWatcher
+
+
+class PollingWatcherTest(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.page = os.path.join(self.content, "blog", "index.md")
+        write_file(self.page, "# Blog")
+        write_file(self.template, "{{ Content }}")
+        self.watcher = PollingWatcher([self.content, self.template])
+
+    def test_it_reports_nothing_without_changes(self):
+        self.assertEqual(set(), self.watcher.poll())
+
+    def test_it_reports_modified_files(self):
+        write_file(self.page, "# Blog posts")
+
+        self.assertEqual({self.page}, self.watcher.poll())
+        self.assertEqual(set(), self.watcher.poll())
+
+    def test_it_reports_added_and_removed_files(self):
+        new_page = os.path.join(self.content, "new.md")
+        write_file(new_page, "# New")
+        os.remove(self.page)
+
+        self.assertEqual({new_page, self.page}, self.watcher.poll())
+
+    def test_it_watches_single_files(self):
+        write_file(self.template, "<main>{{ Content }}</main>")
+
+        self.assertEqual({self.template}, self.watcher.poll())
+
+
+if __name__ == '__main__':
+    unittest.main()